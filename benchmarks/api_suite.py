@@ -0,0 +1,248 @@
+"""
+Latency, query count and memory of every API endpoint and of every filter in
+shop_api/filters.py, measured in-process against the current database.
+
+Seed a dataset of the wanted size first, for example:
+
+    python manage.py seed_benchmark_data --products 1000000 --orders 1000000 --reviews 2000000
+    python benchmarks/api_suite.py --repeat 20 --output results.json
+
+Each case is requested --repeat times after --warmup requests. The response
+cache is cleared before every request unless --warm-cache is given. Results are
+printed as a table and, with --output, written as JSON for regression tracking.
+The staff user used for the requests is created in a transaction that is rolled back.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_diplom.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Max, Min  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from shop_api.filters import ProductFilter, ReviewFilter, OrderFilter, DailySalesFilter  # noqa: E402
+from shop_api.models import Collection, DailySales, Order, OrderedProducts, Product, Review  # noqa: E402
+
+
+RANGE_SUFFIXES = ('_min', '_max', '_after', '_before')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Case:
+
+    def __init__(self, name, url, params=None, client='staff'):
+        self.name = name
+        self.url = url
+        self.params = params or {}
+        self.client = client
+
+
+def middle(model):
+    return model.objects.order_by('pk')[model.objects.count() // 2]
+
+
+def build_cases():
+    product = middle(Product)
+    prices = Product.objects.aggregate(low=Min('price'), high=Max('price'))
+    price_step = max((prices['high'] - prices['low']) // 100, 1)
+    review = middle(Review)
+    order = middle(Order)
+    week = (order.created_at - datetime.timedelta(days=7)).isoformat(), order.created_at.isoformat()
+    word = product.description.split()[0] if product.description else product.name.split()[0]
+
+    products, reviews = reverse('products-list'), reverse('reviews-list')
+    orders, analytics = reverse('orders-list'), reverse('analytics-list')
+    return [
+        Case('products: list', products),
+        Case('products: detail', reverse('products-detail', args=[product.pk])),
+        Case('products: price', products, {'price_min': prices['low'], 'price_max': prices['low'] + price_step}),
+        Case('products: name', products, {'name': product.name.split()[-1]}),
+        Case('products: description', products, {'description': word}),
+        Case('products: rating', products, {'rating_min': 4.5}),
+        Case('products: review_count', products, {'review_count_min': 5}),
+        Case('products: ordering by price', products, {'ordering': '-price'}),
+        Case('products: ordering by rating', products, {'ordering': '-rating'}),
+        Case('products: ordering by review_count', products, {'ordering': '-review_count'}),
+        Case('products: ordering by created_at', products, {'ordering': 'created_at'}),
+        Case('products: search', products, {'search': word}),
+        Case('products: price + rating', products, {'price_max': prices['low'] + 10 * price_step, 'rating_min': 4}),
+        Case('reviews: list', reviews),
+        Case('reviews: user', reviews, {'user': review.user_id}),
+        Case('reviews: product', reviews, {'product': product.pk}),
+        Case('reviews: created_at', reviews, {'created_at': review.created_at.isoformat()}),
+        Case('reviews: export', reverse('reviews-export'), {'product': product.pk}),
+        Case('orders: list', orders),
+        Case('orders: list as customer', orders, client='customer'),
+        Case('orders: detail', reverse('orders-detail', args=[order.pk])),
+        Case('orders: status', orders, {'status': Order.DONE}),
+        Case('orders: price', orders, {'price_min': order.total_price, 'price_max': order.total_price * 2}),
+        Case('orders: ordered_products', orders, {'ordered_products': product.pk}),
+        Case('orders: creation', orders, {'creation_after': week[0], 'creation_before': week[1]}),
+        Case('orders: update', orders, {'update_after': week[0], 'update_before': week[1]}),
+        Case('orders: created_at', orders, {'created_at': week[1]}),
+        Case('orders: updated_at', orders, {'updated_at': week[1]}),
+        Case('orders: status + creation', orders,
+             {'status': Order.DONE, 'creation_after': week[0], 'creation_before': week[1]}),
+        Case('orders: export', reverse('orders-export'), {'creation_after': week[0], 'creation_before': week[1]}),
+        Case('collections: list', reverse('collections-list')),
+        Case('collections: detail', reverse('collections-detail', args=[middle(Collection).pk])),
+        Case('analytics: revenue', analytics, {'date_after': week[0], 'date_before': week[1]}),
+        Case('analytics: status', analytics, {'status': Order.DONE}),
+        Case('analytics: product', analytics, {'product': product.pk}),
+        Case('analytics: top products', reverse('analytics-top-products'),
+             {'date_after': week[0], 'date_before': week[1]}),
+    ], order.user
+
+
+def uncovered_filters(cases):
+    """
+    Names of filters declared in shop_api/filters.py that no case exercises.
+    """
+    filtersets = {
+        reverse('products-list'): ProductFilter,
+        reverse('reviews-list'): ReviewFilter,
+        reverse('reviews-export'): ReviewFilter,
+        reverse('orders-list'): OrderFilter,
+        reverse('orders-export'): OrderFilter,
+        reverse('analytics-list'): DailySalesFilter,
+        reverse('analytics-top-products'): DailySalesFilter,
+    }
+    used = {filterset_class: set() for filterset_class in filtersets.values()}
+    for case in cases:
+        if case.url in filtersets:
+            for param in case.params:
+                name = next((param[:-len(suffix)] for suffix in RANGE_SUFFIXES if param.endswith(suffix)), param)
+                used[filtersets[case.url]].add(name)
+    return sorted(
+        f'{filterset_class.__name__}.{name}'
+        for filterset_class, names in used.items()
+        for name in filterset_class.base_filters if name not in names
+    )
+
+
+def request(client, case):
+    response = client.get(case.url, case.params)
+    if response.streaming:
+        return response.status_code, sum(len(part) for part in response.streaming_content)
+    return response.status_code, len(response.content)
+
+
+def measure(client, case, repeat, warmup, warm_cache):
+    for _ in range(warmup):
+        request(client, case)
+
+    latencies = []
+    for _ in range(repeat):
+        if not warm_cache:
+            cache.clear()
+        started = time.perf_counter()
+        status, size = request(client, case)
+        latencies.append(time.perf_counter() - started)
+
+    # Queries and memory come from one more request, so that tracing does not inflate the latencies.
+    if not warm_cache:
+        cache.clear()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as context:
+        request(client, case)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'name': case.name,
+        'url': case.url,
+        'params': case.params,
+        'status': status,
+        'bytes': size,
+        'queries': len(context.captured_queries),
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--warm-cache', action='store_true')
+    parser.add_argument('--only', default='', help='Run only the cases whose name contains this text')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if not (Product.objects.exists() and Order.objects.exists() and Review.objects.exists()):
+        sys.exit('The database is empty: run "python manage.py seed_benchmark_data" first.')
+
+    # Lets the test client's "testserver" host through ALLOWED_HOSTS.
+    setup_test_environment()
+    cases, customer = build_cases()
+    for name in uncovered_filters(cases):
+        print(f'warning: no case for {name}', file=sys.stderr)
+    cases = [case for case in cases if args.only in case.name]
+
+    results = []
+    try:
+        with transaction.atomic():
+            clients = {'staff': APIClient(), 'customer': APIClient()}
+            clients['staff'].force_authenticate(User.objects.create(username='bench_api_staff', is_staff=True))
+            clients['customer'].force_authenticate(customer)
+
+            print(f'{"case":<40} {"status":>6} {"queries":>7} {"p50 ms":>9} {"p95 ms":>9} {"peak KB":>9}')
+            for case in cases:
+                result = measure(clients[case.client], case, args.repeat, args.warmup, args.warm_cache)
+                results.append(result)
+                print(f'{case.name:<40} {result["status"]:>6} {result["queries"]:>7} {result["p50_ms"]:>9.2f} '
+                      f'{result["p95_ms"]:>9.2f} {result["peak_memory_kb"]:>9.0f}')
+            raise Rollback
+    except Rollback:
+        pass
+
+    if args.output:
+        report = {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'rows': {model._meta.label: model.objects.count()
+                     for model in (Product, Review, Order, OrderedProducts, Collection, DailySales)},
+            'settings': vars(args),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Concurrent-request latency of the catalogue read endpoints under WSGI and ASGI.
+
+Start both servers against the same database, for example:
+
+    gunicorn dj_diplom.wsgi --workers 4 --threads 8 --bind 127.0.0.1:8001
+    uvicorn dj_diplom.asgi:application --workers 4 --port 8002
+
+and run:
+
+    python benchmarks/asgi_vs_wsgi.py --concurrency 64 --requests 5000 \\
+        wsgi=http://127.0.0.1:8001/api/v1/products/ \\
+        asgi=http://127.0.0.1:8002/api/v1/async/products/
+
+Only the standard library is used, so the load generator has no effect on the
+servers' dependencies.
+"""
+import argparse
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return time.perf_counter() - started, status
+
+
+def run(url, concurrency, requests):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(fetch, [url] * concurrency))  # warm up connections and caches
+        started = time.perf_counter()
+        results = list(executor.map(fetch, [url] * requests))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'rps': requests / elapsed,
+        'p50': quantiles[49] * 1000,
+        'p95': quantiles[94] * 1000,
+        'p99': quantiles[98] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='+', metavar='LABEL=URL')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f'{"target":<12} {"req/s":>10} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10} {"errors":>8}')
+    for target in args.targets:
+        label, url = target.split('=', 1)
+        result = run(url, args.concurrency, args.requests)
+        print(f'{label:<12} {result["rps"]:>10.1f} {result["p50"]:>10.2f} {result["p95"]:>10.2f} '
+              f'{result["p99"]:>10.2f} {result["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Seed a throwaway dataset and print the PostgreSQL plans of the queries built by
+ProductFilter, ReviewFilter and OrderFilter.
+
+    python benchmarks/explain_filters.py --products 50000 --orders 200000
+
+Everything runs inside a transaction that is rolled back at the end. To see the
+plan change, run it once after ``python manage.py migrate shop_api 0002`` and
+once after ``python manage.py migrate shop_api``.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_diplom.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from shop_api.filters import ProductFilter, ReviewFilter, OrderFilter  # noqa: E402
+from shop_api.models import Product, Review, Order  # noqa: E402
+
+
+WORDS = ['карниз', 'штанга', 'кронштейн', 'металлический', 'квадро', 'хром', 'матовый', 'ряд',
+         'золото', 'латунь', 'белый', 'профиль', 'потолочный', 'настенный', 'наконечник']
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(users, products, orders, reviews, batch_size=5000):
+    rng = random.Random(0)
+    User.objects.bulk_create(
+        [User(username=f'bench_user_{i}') for i in range(users)], batch_size=batch_size
+    )
+    user_ids = list(User.objects.filter(username__startswith='bench_user_').values_list('id', flat=True))
+
+    Product.objects.bulk_create(
+        [Product(name=f'Товар {i}', description=' '.join(rng.choices(WORDS, k=12)), price=rng.randint(100, 50000))
+         for i in range(products)],
+        batch_size=batch_size,
+    )
+    product_ids = list(Product.objects.filter(name__startswith='Товар ').values_list('id', flat=True))
+
+    statuses = [status for status, _ in Order.STATUS_CHOICES]
+    Order.objects.bulk_create(
+        [Order(user_id=rng.choice(user_ids), status=rng.choice(statuses), total_price=rng.randint(100, 500000))
+         for _ in range(orders)],
+        batch_size=batch_size,
+    )
+
+    pairs = {(rng.choice(user_ids), rng.choice(product_ids)) for _ in range(reviews)}
+    Review.objects.bulk_create(
+        [Review(user_id=user_id, product_id=product_id, text='отзыв', rating=rng.randint(1, 5))
+         for user_id, product_id in pairs],
+        batch_size=batch_size,
+    )
+
+    with connection.cursor() as cursor:
+        for table in (Order._meta.db_table, Review._meta.db_table, Product._meta.db_table):
+            cursor.execute(
+                f"UPDATE {table} SET created_at = DATE '2020-01-01' + (id % 730), "
+                f"updated_at = DATE '2020-01-01' + (id % 730) + (id % 30)"
+            )
+            cursor.execute(f'ANALYZE {table}')
+    return user_ids, product_ids
+
+
+def filter_cases(user_id, product_id):
+    return [
+        ('products: name icontains', ProductFilter, Product, {'name': 'товар 123'}),
+        ('products: description icontains', ProductFilter, Product, {'description': 'латунь'}),
+        ('products: price range', ProductFilter, Product, {'price_min': 1000, 'price_max': 1200}),
+        ('reviews: user', ReviewFilter, Review, {'user': user_id}),
+        ('reviews: product', ReviewFilter, Review, {'product': product_id}),
+        ('reviews: created_at', ReviewFilter, Review, {'created_at': '2021-03-01'}),
+        ('orders: status', OrderFilter, Order, {'status': Order.DONE}),
+        ('orders: price range', OrderFilter, Order, {'price_min': 1000, 'price_max': 1500}),
+        ('orders: creation range', OrderFilter, Order, {'creation_after': '2021-03-01', 'creation_before': '2021-03-07'}),
+        ('orders: update range', OrderFilter, Order, {'update_after': '2021-03-01', 'update_before': '2021-03-07'}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=50000)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit('The plans are only meaningful on PostgreSQL.')
+
+    try:
+        with transaction.atomic():
+            user_ids, product_ids = seed(args.users, args.products, args.orders, args.reviews)
+            for title, filterset_class, model, params in filter_cases(user_ids[0], product_ids[0]):
+                queryset = filterset_class(params, queryset=model.objects.all()).qs
+                print(f'=== {title} {params}')
+                print(queryset.explain(analyze=True))
+                print()
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Rendering and parsing time of the API's JSON payloads: DRF's stdlib-based
+JSONRenderer and JSONParser against the orjson-based ones in shop_api/fastjson.py.
+
+    python benchmarks/json_renderer.py --rows 100 --positions 5
+
+Payloads are real serializer output: a paginated page of OrderSerializer
+data with nested positions and users, a page of ProductSerializer data, and
+as request bodies an order with --positions positions and a bulk product
+import of --rows rows. Test data is created inside a transaction that is rolled back.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_diplom.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import transaction  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from shop_api import fastjson  # noqa: E402
+from shop_api.fastjson import ORJSONParser, ORJSONRenderer  # noqa: E402
+from shop_api.models import Order, OrderedProducts, Product  # noqa: E402
+from shop_api.serializers import OrderSerializer, ProductSerializer  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(rows, positions):
+    rng = random.Random(0)
+    users = User.objects.bulk_create([User(username=f'bench_json_{i}', first_name='Имя', last_name='Фамилия')
+                                      for i in range(rows)])
+    products = Product.objects.bulk_create([
+        Product(name=f'Товар bench_json_{i}', description='Описание товара ' * 10, price=rng.randint(100, 5000),
+                rating_avg=rng.random() * 5, review_count=rng.randint(0, 50))
+        for i in range(rows)
+    ])
+    orders = Order.objects.bulk_create([Order(user=rng.choice(users), total_price=1) for _ in range(rows)])
+    OrderedProducts.objects.bulk_create([
+        OrderedProducts(order=order, product=rng.choice(products), quantity=rng.randint(1, 5), unit_price=100)
+        for order in orders for _ in range(positions)
+    ])
+    return products, orders
+
+
+def page(results):
+    return {'next': 'http://testserver/api/v1/orders/?cursor=cD0yMDI0LTAxLTAx', 'previous': None,
+            'results': results}
+
+
+def best_of(function, repeat, rounds=5):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--positions', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if fastjson.orjson is None:
+        print('orjson is not installed: ORJSONRenderer and ORJSONParser fall back to the stdlib', file=sys.stderr)
+
+    try:
+        with transaction.atomic():
+            products, orders = seed(args.rows, args.positions)
+            instances = Order.objects.filter(pk__in=[order.pk for order in orders]).select_related('user') \
+                .prefetch_related('ordered_products', 'positions')
+            payloads = {
+                'orders page': page(OrderSerializer(instances, many=True).data),
+                'products page': page(ProductSerializer(products, many=True).data),
+            }
+            bodies = {
+                'order create': JSONRenderer().render({'ordered_products': [
+                    {'product': product.pk, 'quantity': 2} for product in products[:args.positions]
+                ]}),
+                'bulk import': JSONRenderer().render([
+                    {'name': product.name, 'description': product.description, 'price': product.price}
+                    for product in products
+                ]),
+            }
+            raise Rollback
+    except Rollback:
+        pass
+
+    print(f'{"payload":<22} {"KB":>8} {"stdlib µs":>10} {"orjson µs":>10} {"speedup":>8}')
+    for name, data in payloads.items():
+        content = ORJSONRenderer().render(data)
+        assert content == JSONRenderer().render(data), f'{name}: rendered output differs'
+        slow = best_of(lambda: JSONRenderer().render(data), args.repeat)
+        fast = best_of(lambda: ORJSONRenderer().render(data), args.repeat)
+        print(f'{"render " + name:<22} {len(content) / 1024:>8.1f} {slow * 1e6:>10.1f} {fast * 1e6:>10.1f} '
+              f'{slow / fast:>7.1f}x')
+    for name, body in bodies.items():
+        slow = best_of(lambda: JSONParser().parse(io.BytesIO(body)), args.repeat)
+        fast = best_of(lambda: ORJSONParser().parse(io.BytesIO(body)), args.repeat)
+        print(f'{"parse " + name:<22} {len(body) / 1024:>8.1f} {slow * 1e6:>10.1f} {fast * 1e6:>10.1f} '
+              f'{slow / fast:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Rows per second of the product and order list serialization: DRF
+ModelSerializer over model instances (as before) against CompiledSerializer
+over .values() rows (as served by CompiledListMixin).
+
+"total" covers loading a page and serializing it. "serialize" covers the
+serialization of an already loaded page. For compiled orders, that includes
+the positions queries, which the instances path runs as prefetches while loading.
+
+    python benchmarks/list_serialization.py --rows 100 --repeat 50
+
+Each page of --rows rows is loaded and serialized --repeat times, and the
+best of several rounds is reported. Orders carry --positions positions each.
+Test data is created inside a transaction that is rolled back.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_diplom.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.db.models import Prefetch  # noqa: E402
+
+from shop_api.fastlist import compiled_serializer  # noqa: E402
+from shop_api.models import Order, OrderedProducts, Product  # noqa: E402
+from shop_api.serializers import OrderSerializer, ProductSerializer  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(rows, positions):
+    rng = random.Random(0)
+    users = User.objects.bulk_create([User(username=f'bench_rows_{i}', first_name='Имя', last_name='Фамилия')
+                                      for i in range(rows)])
+    products = Product.objects.bulk_create([
+        Product(name=f'bench_rows_{i}', description='Описание товара ' * 5, price=rng.randint(100, 5000),
+                rating_avg=rng.random() * 5, review_count=rng.randint(0, 50))
+        for i in range(rows)
+    ])
+    orders = Order.objects.bulk_create([Order(user=rng.choice(users), total_price=1) for _ in range(rows)])
+    OrderedProducts.objects.bulk_create([
+        OrderedProducts(order=order, product=rng.choice(products), quantity=rng.randint(1, 5), unit_price=100)
+        for order in orders for _ in range(positions)
+    ])
+    return [product.pk for product in products], [order.pk for order in orders]
+
+
+def rows_per_second(function, rows, repeat, rounds=5):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--positions', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            product_ids, order_ids = seed(args.rows, args.positions)
+            products = Product.objects.defer('search_vector').filter(pk__in=product_ids).order_by('-id')
+            orders = Order.objects.filter(pk__in=order_ids).order_by('-id')
+            instances = orders.select_related('user').prefetch_related(
+                Prefetch('ordered_products', queryset=OrderedProducts.objects.order_by('pk')),
+            )
+            compiled_products = compiled_serializer(ProductSerializer)
+            compiled_orders = compiled_serializer(OrderSerializer)
+
+            cases = [
+                ('products', lambda: list(products.all()), lambda page: ProductSerializer(page, many=True).data,
+                 lambda: list(products.values(*compiled_products.columns)), compiled_products.serialize),
+                ('orders', lambda: list(instances.all()), lambda page: OrderSerializer(page, many=True).data,
+                 lambda: list(orders.values(*compiled_orders.columns)), compiled_orders.serialize),
+            ]
+            print(f'{"list":<10} {"":<10} {"serializer rows/s":>18} {"compiled rows/s":>16} {"speedup":>8}')
+            for name, load, serialize, load_rows, serialize_rows in cases:
+                page, rows = load(), load_rows()
+                assert serialize(page) == serialize_rows(rows), f'{name}: compiled output differs'
+                results = {
+                    'total': (lambda: serialize(load()), lambda: serialize_rows(load_rows())),
+                    'serialize': (lambda: serialize(page), lambda: serialize_rows(rows)),
+                }
+                for part, (before, after) in results.items():
+                    slow = rows_per_second(before, args.rows, args.repeat)
+                    fast = rows_per_second(after, args.rows, args.repeat)
+                    print(f'{name:<10} {part:<10} {slow:>18.0f} {fast:>16.0f} {fast / slow:>7.1f}x')
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
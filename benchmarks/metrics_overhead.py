@@ -0,0 +1,134 @@
+"""
+Overhead of QueryMetricsMiddleware relative to the requests it measures.
+
+    python benchmarks/metrics_overhead.py --budget 5
+
+End-to-end timings of a ~1 ms request vary by more than the middleware costs,
+so the overhead is measured in parts: the fixed cost per request (middleware
+around a handler that returns a ready response) and the cost of the execute
+wrapper per query. Each endpoint's overhead is then estimated from its median
+latency and query count. The script exits with status 1 when an endpoint's
+overhead exceeds --budget percent. Test data is created inside a transaction
+that is rolled back.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_diplom.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from shop_api.metrics import QueryMetricsMiddleware, RequestMetrics, registry  # noqa: E402
+from shop_api.models import Order, OrderedProducts, Product  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(products, orders):
+    rng = random.Random(0)
+    user = User.objects.create(username='bench_metrics')
+    Product.objects.bulk_create([Product(name=f'bench_metrics_{i}', price=rng.randint(100, 5000))
+                                 for i in range(products)])
+    product_ids = list(Product.objects.filter(name__startswith='bench_metrics_').values_list('id', flat=True))
+    Order.objects.bulk_create([Order(user=user, total_price=1) for _ in range(orders)])
+    OrderedProducts.objects.bulk_create([
+        OrderedProducts(order=order, product_id=rng.choice(product_ids), quantity=1, unit_price=1)
+        for order in Order.objects.filter(user=user)
+    ])
+    return user
+
+
+def best_of(function, repeat, rounds=7):
+    """
+    Lowest mean time of one call over several rounds, in microseconds.
+    """
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        timings.append((time.perf_counter() - started) / repeat)
+    return min(timings) * 1e6
+
+
+def fixed_cost(repeat):
+    request = RequestFactory().get('/')
+    response = HttpResponse(b'x' * 4096)
+    middleware = QueryMetricsMiddleware(lambda request: response)
+    cost = best_of(lambda: middleware(request), repeat) - best_of(lambda: response, repeat)
+    registry.reset()
+    return cost
+
+
+def per_query_cost(repeat):
+    def query():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    with connection.execute_wrapper(RequestMetrics()):
+        wrapped = best_of(query, repeat)
+    return wrapped - best_of(query, repeat)
+
+
+def endpoint_cost(client, url, requests):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get(url)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6, len(context.captured_queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20000)
+    parser.add_argument('--budget', type=float, default=5.0, help='Allowed overhead, percent')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    over_budget = False
+    try:
+        with transaction.atomic():
+            user = seed(products=200, orders=200)
+            fixed, per_query = fixed_cost(args.repeat), per_query_cost(args.repeat)
+            print(f'fixed cost per request: {fixed:.1f} µs, per query: {per_query:.2f} µs')
+
+            client = APIClient()
+            client.force_authenticate(user)
+            print(f'{"endpoint":<20} {"median µs":>10} {"queries":>8} {"overhead µs":>12} {"overhead %":>11}')
+            for url in (reverse('products-list'), reverse('orders-list'), reverse('collections-list')):
+                latency, queries = endpoint_cost(client, url, args.requests)
+                overhead = fixed + per_query * queries
+                percent = overhead / latency * 100
+                over_budget |= percent > args.budget
+                print(f'{url:<20} {latency:>10.1f} {queries:>8} {overhead:>12.1f} {percent:>10.1f}%')
+            raise Rollback
+    except Rollback:
+        pass
+
+    if over_budget:
+        sys.exit(f'Overhead exceeds the budget of {args.budget}%')
+
+
+if __name__ == '__main__':
+    main()
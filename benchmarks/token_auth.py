@@ -0,0 +1,83 @@
+"""
+Compare requests/sec of the stock TokenAuthentication against
+CachedTokenAuthentication on a view that does nothing but authenticate.
+
+    python benchmarks/token_auth.py --requests 5000
+
+Test users and tokens are created inside a transaction that is rolled back.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dj_diplom.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import transaction  # noqa: E402
+from rest_framework.authentication import TokenAuthentication  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.permissions import IsAuthenticated  # noqa: E402
+from rest_framework.response import Response  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.views import APIView  # noqa: E402
+
+from shop_api.authentication import CachedTokenAuthentication, token_cache  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_view(authentication_class):
+    class WhoAmI(APIView):
+        authentication_classes = [authentication_class]
+        permission_classes = [IsAuthenticated]
+
+        def get(self, request):
+            return Response({'id': request.user.id})
+
+    return WhoAmI.as_view()
+
+
+def run(view, keys, requests):
+    factory = APIRequestFactory()
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for _ in range(requests):
+        request = factory.get('/', HTTP_AUTHORIZATION='Token ' + rng.choice(keys))
+        response = view(request)
+        assert response.status_code == 200
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([User(username=f'bench_auth_{i}') for i in range(args.users)])
+            users = User.objects.filter(username__startswith='bench_auth_')
+            keys = [Token.objects.create(user=user).key for user in users]
+
+            token_cache.clear()
+            for title, authentication_class in (('TokenAuthentication', TokenAuthentication),
+                                                ('CachedTokenAuthentication', CachedTokenAuthentication)):
+                rate = run(make_view(authentication_class), keys, args.requests)
+                print(f'{title:<28} {rate:10.1f} req/s')
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop_api.metrics.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -92,6 +93,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The response cache versions and the shared token cache must be visible to
+# every worker process, so the default cache is a shared backend: the database
+# table created by "manage.py createcachetable" (or Redis/Memcached in production).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shop_api_cache',
+    }
+}
+
+# Lifetime of cached list responses. Entries are invalidated through model
+# version counters, the timeout only bounds how long orphaned entries are kept.
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -137,6 +158,54 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'shop_api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'shop_api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # orjson-based, with the same output as DRF's JSON renderer and parser;
+    # they fall back to the stdlib json module when orjson is not installed.
+    'DEFAULT_RENDERER_CLASSES': [
+        'shop_api.fastjson.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'shop_api.fastjson.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
+
+# Upper bound for the page_size query parameter of list endpoints
+
+MAX_PAGE_SIZE = 100
+
+# In-process cache of authentication tokens. Entries are evicted when the token
+# is deleted or its user changes, but only in the worker that made the change:
+# TOKEN_CACHE_TIMEOUT is the window in which other workers still accept a revoked
+# token. TOKEN_CACHE_SHARED keeps the entries in the default Django cache instead,
+# so revocation is immediate everywhere, for one cache read per request.
+
+TOKEN_CACHE_TIMEOUT = 60
+
+TOKEN_CACHE_MAX_SIZE = 10000
+
+TOKEN_CACHE_SHARED = False
+
+# shop_api.metrics.QueryMetricsMiddleware reports the query count, SQL and
+# serializer time of every response in a Server-Timing header.
+
+SERVER_TIMING_HEADER = True
+
+# shop_api.querycheck reports statements of the same shape run at least
+# N_PLUS_ONE_THRESHOLD times in one request, and statements slower than
+# SLOW_QUERY_MS. Add shop_api.querycheck.QueryInspectionMiddleware to
+# MIDDLEWARE on staging to log them.
+
+N_PLUS_ONE_THRESHOLD = 5
+
+SLOW_QUERY_MS = 100
+
+# Longest wait, in milliseconds, for the product row locks taken while an order
+# is placed (PostgreSQL only); the request then fails with 503 and can be retried.
+
+ORDER_LOCK_TIMEOUT_MS = 2000
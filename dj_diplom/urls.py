@@ -15,7 +15,8 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from shop_api import views
+from shop_api import views, async_views
+from shop_api.metrics import MetricsView
 from rest_framework.routers import DefaultRouter
 
 
@@ -25,8 +26,18 @@ router.register('products', views.ProductViewSet, basename='products')
 router.register('product-reviews', views.ReviewViewSet, basename='reviews')
 router.register('orders', views.OrderViewSet, basename='orders')
 router.register('collections', views.CollectionViewSet, basename='collections')
+router.register('analytics', views.SalesAnalyticsViewSet, basename='analytics')
+
+async_urlpatterns = [
+    path('products/', async_views.product_list, name='async-products-list'),
+    path('products/<int:pk>/', async_views.product_detail, name='async-products-detail'),
+    path('collections/', async_views.collection_list, name='async-collections-list'),
+    path('collections/<int:pk>/', async_views.collection_detail, name='async-collections-detail'),
+]
 
 urlpatterns = [
+    path('api/v1/async/', include(async_urlpatterns)),
+    path('api/v1/metrics/', MetricsView.as_view(), name='metrics'),
     path('api/v1/', include(router.urls)),
     path('admin/', admin.site.urls),
 ]
@@ -1,11 +1,26 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.forms.models import BaseInlineFormSet
+from django.db.models import F
 from .models import Product, Review, Order, Collection, OrderedProducts
+from .analytics import order_changed, order_placed, order_removed, sales_lines
+from .orders import recompute_order_totals
+
+
+class OrderedProductsFormSet(BaseInlineFormSet):
+
+    def save_existing(self, form, obj, commit=True):
+        # A position moved to another product takes that product's price
+        # unless the price was edited in the same form.
+        if 'product' in form.changed_data and 'unit_price' not in form.changed_data:
+            obj.unit_price = None
+        return super().save_existing(form, obj, commit)
 
 
 class OrderedProductsInLine(admin.TabularInline):
     model = OrderedProducts
+    formset = OrderedProductsFormSet
     extra = 1
 
 
@@ -26,11 +41,44 @@ admin.site.register(User, UserAdmin)
 class ProductAdmin(admin.ModelAdmin):
     inlines = [ReviewInLine]
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            # Edits made here also invalidate the versions API clients hold.
+            Product.objects.filter(pk=obj.pk).update(version=F('version') + 1)
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     inlines = [OrderedProductsInLine]
+    readonly_fields = ('total_price',)
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            old = Order.objects.get(pk=obj.pk)
+            obj._sales_snapshot = (old.status, sales_lines(old))
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        order = form.instance
+        recompute_order_totals(Order.objects.filter(pk=order.pk))
+        if change:
+            order_changed(order, *order._sales_snapshot, sales_lines(order))
+        else:
+            order_placed(order, sales_lines(order))
+
+    def delete_model(self, request, obj):
+        lines = sales_lines(obj)
+        super().delete_model(request, obj)
+        order_removed(obj, lines)
+
+    def delete_queryset(self, request, queryset):
+        removed = [(order, sales_lines(order)) for order in queryset]
+        super().delete_queryset(request, queryset)
+        for order, lines in removed:
+            order_removed(order, lines)
 
 
 @admin.register(Collection)
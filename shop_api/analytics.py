@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F, Max, Min, Sum
+
+from .models import DailySales, Order, OrderedProducts
+
+
+def sales_lines(order):
+    return list(order.ordered_products.values_list('product_id', 'quantity', 'unit_price'))
+
+
+def position_lines(positions):
+    return [(position.product_id, position.quantity, position.unit_price) for position in positions]
+
+
+def add_lines(delta, day, status, lines, sign):
+    for product_id, quantity, unit_price in lines:
+        row = delta[day, product_id, status]
+        row[0] += sign * quantity
+        row[1] += sign * quantity * unit_price
+
+
+def apply_sales_delta(delta):
+    """
+    Add the {(day, product_id, status): [quantity, revenue]} deltas to the rollup
+    with a single INSERT ... ON CONFLICT DO UPDATE.
+    """
+    delta = {key: value for key, value in delta.items() if any(value)}
+    if not delta:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(DailySales._meta.db_table)
+    columns = ['day', 'product_id', 'status', 'quantity', 'revenue']
+    day_field = DailySales._meta.get_field('day')
+    # Rows go in key order, so concurrent upserts lock the buckets they share
+    # in the same order and cannot deadlock each other.
+    rows = [
+        [day_field.get_db_prep_value(day, connection), product_id, status, quantity, revenue]
+        for (day, product_id, status), (quantity, revenue) in sorted(delta.items())
+    ]
+    batch_size = min(connection.ops.bulk_batch_size(columns, rows), 1000)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(quote(column) for column in columns)}) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({quote("day")}, {quote("product_id")}, {quote("status")}) DO UPDATE SET '
+                f'{quote("quantity")} = {table}.{quote("quantity")} + excluded.{quote("quantity")}, '
+                f'{quote("revenue")} = {table}.{quote("revenue")} + excluded.{quote("revenue")}',
+                [value for row in batch for value in row],
+            )
+
+    # Buckets emptied by a status change or a deleted order carry no information.
+    if any(quantity < 0 for quantity, _ in delta.values()):
+        DailySales.objects.filter(day__in={day for day, _, _ in delta}, quantity=0, revenue=0).delete()
+
+
+def order_placed(order, lines):
+    delta = defaultdict(lambda: [0, 0])
+    add_lines(delta, order.created_at, order.status, lines, 1)
+    apply_sales_delta(delta)
+
+
+def order_removed(order, lines):
+    delta = defaultdict(lambda: [0, 0])
+    add_lines(delta, order.created_at, order.status, lines, -1)
+    apply_sales_delta(delta)
+
+
+def order_changed(order, old_status, old_lines, lines):
+    if order.status == old_status and sorted(lines) == sorted(old_lines):
+        return
+    delta = defaultdict(lambda: [0, 0])
+    add_lines(delta, order.created_at, old_status, old_lines, -1)
+    add_lines(delta, order.created_at, order.status, lines, 1)
+    apply_sales_delta(delta)
+
+
+def add_orders_to_rollup(orders, sign=1):
+    """
+    Add the positions of the given orders to the rollup (sign=-1 subtracts
+    them), aggregated in the database.
+    """
+    rows = OrderedProducts.objects.filter(order__in=orders).values(
+        'product_id', day=F('order__created_at'), status=F('order__status')
+    ).annotate(
+        quantity_sum=Sum('quantity'), revenue_sum=Sum(F('quantity') * F('unit_price'))
+    ).order_by()
+    delta = {
+        (row['day'], row['product_id'], row['status']): [sign * row['quantity_sum'], sign * row['revenue_sum']]
+        for row in rows
+    }
+    apply_sales_delta(delta)
+    return len(delta)
+
+
+def rebuild_daily_sales(batch_size=10000):
+    """
+    Rebuild the whole rollup from the order positions, batch by batch of order ids.
+    Call it inside a transaction so that readers never see a half-built rollup.
+    """
+    DailySales.objects.all().delete()
+    bounds = Order.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return 0
+
+    updated = 0
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        updated += add_orders_to_rollup(Order.objects.filter(id__gte=start, id__lt=start + batch_size))
+    return updated
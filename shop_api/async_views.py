@@ -0,0 +1,122 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+
+from .filters import ProductFilter, ProductSearchFilter
+from .models import Product, Collection
+from .pagination import KeysetPagination
+from .serializers import ProductSerializer, CollectionSerializer
+
+
+# Parameters of the sync endpoints these views do not implement: rejected
+# rather than ignored, so a client never gets a silently different response.
+UNSUPPORTED_PARAMS = ('fields', 'omit', 'expand')
+
+
+class ProductListView:
+    """
+    Stands in for ProductViewSet where KeysetPagination asks the view for its
+    filter backends: the search rank orders results when ?search= is given.
+    """
+
+    filter_backends = [ProductSearchFilter]
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+async def paginated_response(request, queryset, serialize, view=None):
+    """
+    Same cursor and envelope as the sync list endpoints (KeysetPagination).
+    """
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(queryset, request, view)
+    return json_response(paginator.get_paginated_response(await serialize(page)).data)
+
+
+async def collection_product_ids(collection_ids):
+    product_ids = {collection_id: [] for collection_id in collection_ids}
+    through = Collection.products.through.objects.filter(collection_id__in=collection_ids).order_by('pk')
+    async for collection_id, product_id in through.values_list('collection_id', 'product_id'):
+        product_ids[collection_id].append(product_id)
+    return product_ids
+
+
+def serialize_collection(collection, product_ids):
+    serializer = CollectionSerializer()
+    data = {}
+    for name, field in serializer.fields.items():
+        if name == 'products':
+            data[name] = product_ids
+        else:
+            data[name] = field.to_representation(getattr(collection, field.source))
+    return data
+
+
+def read_only(view):
+    """
+    Allows GET only, wraps the request in a DRF Request for the filters and the
+    paginator, and turns their API exceptions into JSON error responses.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        request = Request(request)
+        try:
+            unsupported = [param for param in UNSUPPORTED_PARAMS if param in request.query_params]
+            if unsupported:
+                raise ValidationError({param: 'Не поддерживается асинхронным API.' for param in unsupported})
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return json_response(data, status=exc.status_code)
+    return wrapper
+
+
+@read_only
+async def product_list(request):
+    filterset = ProductFilter(request.query_params, queryset=Product.objects.defer('search_vector'))
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+
+    queryset = filterset.qs
+    search = ProductSearchFilter()
+    if search.get_search_term(request):
+        # Without PostgreSQL the search builds its index through the sync ORM.
+        queryset = await sync_to_async(search.filter_queryset)(request, queryset, ProductListView)
+
+    async def serialize(products):
+        return ProductSerializer(products, many=True).data
+    return await paginated_response(request, queryset, serialize, ProductListView)
+
+
+@read_only
+async def product_detail(request, pk):
+    try:
+        product = await Product.objects.defer('search_vector').aget(pk=pk)
+    except Product.DoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+    return json_response(ProductSerializer(product).data)
+
+
+@read_only
+async def collection_list(request):
+    async def serialize(collections):
+        product_ids = await collection_product_ids([collection.pk for collection in collections])
+        return [serialize_collection(collection, product_ids[collection.pk]) for collection in collections]
+    return await paginated_response(request, Collection.objects.all(), serialize)
+
+
+@read_only
+async def collection_detail(request, pk):
+    try:
+        collection = await Collection.objects.aget(pk=pk)
+    except Collection.DoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+    product_ids = await collection_product_ids([collection.pk])
+    return json_response(serialize_collection(collection, product_ids[collection.pk]))
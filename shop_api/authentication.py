@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+
+def field_values(instance):
+    return tuple(getattr(instance, field.attname) for field in instance._meta.concrete_fields)
+
+
+def from_values(model, values):
+    return model.from_db(DEFAULT_DB_ALIAS, [field.attname for field in model._meta.concrete_fields], values)
+
+
+class TokenCache:
+    """
+    Bounded LRU of token key -> (user, token) with a per-entry TTL.
+
+    Entries hold field values and every hit builds new User and Token
+    instances, so requests and threads never share a user object. Evictions
+    (token deleted, user changed) clear the local LRU of this process only;
+    other processes keep serving an evicted entry until its TTL runs out. With
+    shared=True the entries live only in the shared Django cache instead, so
+    an eviction reaches every process at once, at the cost of a cache read per
+    request.
+    """
+
+    def __init__(self, max_size, timeout, shared=False):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.shared = shared
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def shared_key(key):
+        return 'shop_api:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        if self.shared:
+            values = cache.get(self.shared_key(key))
+        else:
+            values = self._lookup(key)
+        if values is None:
+            return None
+        user_values, token_values = values
+        user, token = from_values(User, user_values), from_values(Token, token_values)
+        token.user = user
+        return user, token
+
+    def _lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires > time.monotonic():
+                self.entries.move_to_end(key)
+                return values
+            del self.entries[key]
+            return None
+
+    def set(self, key, credentials):
+        user, token = credentials
+        values = (field_values(user), field_values(token))
+        if self.shared:
+            cache.set(self.shared_key(key), values, self.timeout)
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, values)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        if self.shared:
+            cache.delete(self.shared_key(key))
+            return
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        if self.shared:
+            keys = list(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+        else:
+            user_pk = User._meta.concrete_fields.index(User._meta.pk)
+            with self.lock:
+                keys = [key for key, (_, (user_values, _)) in self.entries.items() if user_values[user_pk] == user_id]
+        for key in keys:
+            self.delete(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    timeout=settings.TOKEN_CACHE_TIMEOUT,
+    shared=settings.TOKEN_CACHE_SHARED,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that resolves token keys through token_cache instead
+    of joining Token and User on every request.
+    """
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+        elif not credentials[0].is_active:
+            token_cache.delete(key)
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return credentials
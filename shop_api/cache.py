@@ -0,0 +1,76 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, quote_etag
+from rest_framework.response import Response
+
+
+def version_key(model):
+    return f'shop_api:version:{model._meta.label_lower}'
+
+
+def get_versions(models):
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Random, so a version lost to eviction never repeats an old value.
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def bump_version(model):
+    # A fresh random value rather than incr(), which is a get and a set on some
+    # backends (DatabaseCache): two concurrent bumps could write the same version.
+    cache.set(version_key(model), new_version(), timeout=None)
+
+
+def invalidate(model):
+    # Bumping again on commit stops a concurrent reader from caching
+    # pre-commit data under the new version.
+    bump_version(model)
+    transaction.on_commit(lambda: bump_version(model))
+
+
+class VersionedCacheMixin:
+    """
+    Caches list responses per normalized query string. The key embeds the
+    versions of cache_models, so a write to any of them invalidates it exactly.
+    The versions live in the default cache, which must be shared by all worker
+    processes (see shop_api.checks).
+    """
+
+    cache_models = ()
+
+    def get_response_cache_key(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        versions = get_versions(self.cache_models)
+        raw_key = f'{versions}:{request.accepted_renderer.format}:{request.get_host()}{request.path}?{query}'
+        return 'shop_api:response:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        etag = quote_etag(key.rsplit(':', 1)[-1])
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        data = cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """
+    The response cache versions (shop_api.cache) and TOKEN_CACHE_SHARED rely on
+    the default cache being shared by all worker processes.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f'The default cache {backend} is not shared between processes.',
+            hint='Writes in one worker do not invalidate the cached lists of the others; '
+                 'use DatabaseCache, Redis or Memcached.',
+            id='shop_api.W001',
+        )]
+    return []
@@ -0,0 +1,78 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def conditional_response(request, state, last_modified):
+    """
+    Return a 304/412 response if the request preconditions match, along with
+    the validators that should be sent on a full response.
+    """
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw_etag = f'{state}:{request.user.pk}:{request.accepted_renderer.format}:{request.path}?{query}'
+    etag = quote_etag(hashlib.md5(raw_etag.encode()).hexdigest())
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        response['ETag'] = etag
+    return response, etag, timestamp
+
+
+def set_validators(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+class ConditionalRetrieveMixin:
+
+    def get_conditional_state(self, instance):
+        """
+        Version of the instance for its validators: it must change with
+        everything the detail response includes.
+        """
+        return f'{instance.pk}:{instance.modified_at.isoformat()}', instance.modified_at
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        state, last_modified = self.get_conditional_state(instance)
+        not_modified, etag, timestamp = conditional_response(request, state, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, timestamp)
+
+
+class ConditionalListMixin:
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        aggregates = queryset.order_by().aggregate(last_modified=Max('modified_at'), count=Count('pk'))
+        last_modified = aggregates['last_modified']
+        state = f'{aggregates["count"]}:{last_modified.isoformat() if last_modified else None}'
+        not_modified, etag, timestamp = conditional_response(request, state, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        # Serialized from the queryset filtered above: filtering it again would repeat
+        # the lookups of model choice filters.
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        return set_validators(response, etag, timestamp)
+
+
+class ConditionalGetMixin(ConditionalListMixin, ConditionalRetrieveMixin):
+    """
+    Answers list and detail requests with 304 Not Modified when the
+    client already holds the current version, before any serialization.
+    """
@@ -0,0 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Объект был изменён другим запросом. Загрузите его заново и повторите изменение.'
+    default_code = 'conflict'
+
+
+class Locked(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Товары заказа заняты другими запросами, повторите попытку.'
+    default_code = 'locked'
@@ -0,0 +1,62 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+def stream_csv(rows, fieldnames):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fieldnames)
+    for row in rows:
+        yield writer.writerow(
+            [dumps(row[name]) if isinstance(row[name], (dict, list)) else row[name] for name in fieldnames]
+        )
+
+
+class ExportMixin:
+
+    export_chunk_size = 2000
+    export_formats = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.export_formats:
+            raise ValidationError({'export_format': 'Неизвестный формат выгрузки'})
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        serializer = self.get_serializer()
+        rows = (
+            serializer.to_representation(instance)
+            for instance in queryset.iterator(chunk_size=self.export_chunk_size)
+        )
+
+        if export_format == 'csv':
+            content = stream_csv(rows, list(serializer.fields))
+        else:
+            content = stream_ndjson(rows)
+
+        response = StreamingHttpResponse(content, content_type=self.export_formats[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{export_format}"'
+        return response
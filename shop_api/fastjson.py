@@ -0,0 +1,108 @@
+import codecs
+import json
+import math
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Non-string keys are allowed only on a retry: the option disables orjson's fast path.
+OPTIONS = (orjson.OPT_UTC_Z, orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else ()
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+encoder = JSONEncoder()
+
+
+def default(obj):
+    # Types orjson has no native support for (Decimal, lazy translations,
+    # querysets...) are converted the way DRF's encoder converts them.
+    return encoder.default(obj)
+
+
+SCALARS = frozenset((str, int, bool, type(None)))
+
+
+def has_non_finite(data):
+    """
+    Whether data holds a NaN or an infinity, which orjson writes as null
+    and the stdlib renderer (allow_nan=False) refuses to encode.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if type(value) in SCALARS:
+            continue
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+    return False
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson, producing the same bytes for the compact UTF-8
+    JSON the API serves. Indented output (the browsable API, "; indent=" in
+    Accept), non-default JSON settings, values orjson cannot encode (integers
+    beyond 64 bits) or would write as null (NaN, infinities) and a missing
+    orjson go through the stdlib renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        for option in OPTIONS:
+            try:
+                content = orjson.dumps(data, default=default, option=option)
+                break
+            except orjson.JSONEncodeError:
+                pass
+        else:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Non-finite numbers come out as null: checked only when there is one,
+        # and left to the stdlib renderer to reject.
+        if b'null' in content and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by JSONRenderer to keep the output a strict JavaScript subset.
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser on orjson, for UTF-8 bodies in strict mode; anything else and a
+    missing orjson go through the stdlib parser.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
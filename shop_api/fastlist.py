@@ -0,0 +1,205 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import ForeignKey, ManyToManyField, ManyToOneRel
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+from .pagination import pagination_fields
+
+
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ReadOnlyField,
+)
+
+
+def isoformat(value):
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def field_converter(field):
+    """
+    Function turning a non-null database value into the field's representation,
+    or None when the value is already represented as is.
+    """
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    if type(field) is serializers.ChoiceField and all(isinstance(key, str) for key in field.choices):
+        return None
+    if type(field) is serializers.FloatField:
+        return float
+    if type(field) is serializers.DateField and getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+        return isoformat
+    return field.to_representation
+
+
+class CompiledSerializer:
+    """
+    Read-only equivalent of a ModelSerializer with many=True, working on
+    .values() rows: every field is compiled into a column and a converter,
+    nested serializers on foreign keys into prefixed columns, and reverse
+    foreign keys and many-to-many fields into one query each per page. Related
+    rows are ordered by primary key, like the prefetches of the list views.
+    """
+
+    def __init__(self, serializer_class, prefix='', fields=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.pk = self.model._meta.pk.name
+        self.columns = [prefix + self.pk]
+        # (name, column, converter, nested serializer) in field order; related
+        # fields have no column and are filled in per page by self.related.
+        self.steps = []
+        self.related = []
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only or fields is not None and name not in fields:
+                continue
+            error = ImproperlyConfigured(f'{serializer_class.__name__}.{name} cannot be compiled')
+            if field.source == '*' or '.' in field.source:
+                raise error
+            model_field = self.model._meta.get_field(field.source)
+
+            if isinstance(field, serializers.ListSerializer) and isinstance(model_field, ManyToOneRel):
+                if prefix:
+                    raise error
+                self.related.append((name, self.reverse_loader(type(field.child), model_field)))
+                self.steps.append((name, None, None, None))
+            elif isinstance(field, serializers.ManyRelatedField) and isinstance(model_field, ManyToManyField):
+                if prefix or type(field.child_relation).to_representation \
+                        is not serializers.PrimaryKeyRelatedField.to_representation \
+                        or field.child_relation.pk_field is not None:
+                    raise error
+                self.related.append((name, self.m2m_loader(model_field)))
+                self.steps.append((name, None, None, None))
+            elif isinstance(field, serializers.Serializer) and isinstance(model_field, ForeignKey):
+                nested = CompiledSerializer(type(field), f'{prefix}{field.source}__')
+                if nested.related:
+                    raise error
+                self.columns.extend(nested.columns)
+                self.steps.append((name, nested.columns[0], None, nested))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and isinstance(model_field, ForeignKey):
+                if type(field).to_representation is not serializers.PrimaryKeyRelatedField.to_representation \
+                        or field.pk_field is not None:
+                    raise error
+                self.columns.append(prefix + field.source)
+                self.steps.append((name, prefix + field.source, None, None))
+            elif isinstance(field, (serializers.Serializer, serializers.ListSerializer,
+                                    serializers.RelatedField, serializers.ManyRelatedField)) or model_field.is_relation:
+                raise error
+            else:
+                self.columns.append(prefix + field.source)
+                self.steps.append((name, prefix + field.source, field_converter(field), None))
+        self.columns = list(dict.fromkeys(self.columns))
+
+    def reverse_loader(self, child_class, relation):
+        child = compiled_serializer(child_class)
+        key = relation.field.name
+
+        def load(ids):
+            rows = relation.related_model.objects.filter(**{f'{key}__in': ids}).order_by('pk')
+            grouped = defaultdict(list)
+            for row in rows.values(*dict.fromkeys([key, *child.columns])):
+                grouped[row[key]].append(row)
+            return {parent: child.serialize(rows) for parent, rows in grouped.items()}
+        return load
+
+    def m2m_loader(self, model_field):
+        through = model_field.remote_field.through
+        source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+
+        def load(ids):
+            grouped = defaultdict(list)
+            rows = through.objects.filter(**{f'{source}__in': ids}).order_by('pk').values_list(source, target)
+            for parent, value in rows:
+                grouped[parent].append(value)
+            return grouped
+        return load
+
+    def serialize_row(self, row):
+        data = {}
+        for name, column, convert, nested in self.steps:
+            if column is None:
+                data[name] = None
+                continue
+            value = row[column]
+            if value is None:
+                data[name] = None
+            elif nested is not None:
+                data[name] = nested.serialize_row(row)
+            else:
+                data[name] = value if convert is None else convert(value)
+        return data
+
+    def serialize(self, rows):
+        results = [self.serialize_row(row) for row in rows]
+        if self.related:
+            ids = [row[self.pk] for row in rows]
+            for name, load in self.related:
+                loaded = load(ids)
+                for row, data in zip(rows, results):
+                    data[name] = loaded.get(row[self.pk], [])
+        return results
+
+
+@lru_cache(maxsize=256)
+def compiled_serializer(serializer_class, fields=None):
+    return CompiledSerializer(serializer_class, fields=fields)
+
+
+class CompiledListSerializer:
+    """
+    Stands in for serializer_class(page, many=True) in list responses.
+    """
+
+    def __init__(self, compiled, rows):
+        self.compiled = compiled
+        self.rows = rows
+
+    def to_representation(self, rows):
+        return self.compiled.serialize(rows)
+
+    @property
+    def data(self):
+        return serializers.ReturnList(self.to_representation(self.rows), serializer=self)
+
+
+class CompiledListMixin:
+    """
+    Viewset mixin that serves the list action from .values() rows through a
+    CompiledSerializer built from serializer_class, skipping model instances
+    and the DRF field machinery. The output is the same as serializer_class'.
+    """
+
+    compiled = None
+
+    def get_compiled_serializer(self):
+        # Compiled from the fields of the serializer the view would have used,
+        # which may have been pruned (see SparseFieldsMixin).
+        if self.compiled is None:
+            fields = tuple(super().get_serializer().fields)
+            self.compiled = compiled_serializer(self.get_serializer_class(), fields)
+        return self.compiled
+
+    def list_rows(self, queryset):
+        columns = list(self.get_compiled_serializer().columns)
+        # The paginator reads its cursor positions from the rows.
+        columns.extend(name for name in pagination_fields(self, queryset) if name not in columns)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def paginate_queryset(self, queryset):
+        if self.action == 'list':
+            queryset = self.list_rows(queryset)
+        return super().paginate_queryset(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'list' and kwargs.get('many') and args:
+            rows = args[0]
+            if not isinstance(rows, list):
+                rows = list(self.list_rows(rows))
+            return CompiledListSerializer(self.get_compiled_serializer(), rows)
+        return super().get_serializer(*args, **kwargs)
@@ -1,5 +1,7 @@
 from django_filters import rest_framework as filters
-from .models import Review, Order
+from rest_framework.filters import BaseFilterBackend
+from .models import Review, Order, DailySales
+from .search import search_products
 
 
 class ProductFilter(filters.FilterSet):
@@ -7,6 +9,35 @@ class ProductFilter(filters.FilterSet):
     price = filters.RangeFilter()
     name = filters.CharFilter(field_name="name", lookup_expr="icontains")
     description = filters.CharFilter(field_name="description", lookup_expr="icontains")
+    rating = filters.RangeFilter(field_name="rating_avg")
+    review_count = filters.RangeFilter()
+    ordering = filters.OrderingFilter(
+        fields=(
+            ('price', 'price'),
+            ('rating_avg', 'rating'),
+            ('review_count', 'review_count'),
+            ('created_at', 'created_at'),
+        )
+    )
+
+
+class ProductSearchFilter(BaseFilterBackend):
+
+    search_param = 'search'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+        return search_products(queryset, term)
+
+    def get_ordering(self, request, queryset, view):
+        if self.get_search_term(request):
+            return ['-search_rank']
+        return None
 
 
 class ReviewFilter(filters.FilterSet):
@@ -30,3 +61,12 @@ class OrderFilter(filters.FilterSet):
     def products_filter(self, queryset, name, value):
         query = queryset.filter(ordered_products__product=value)
         return query
+
+
+class DailySalesFilter(filters.FilterSet):
+
+    date = filters.DateFromToRangeFilter(field_name='day')
+
+    class Meta:
+        model = DailySales
+        fields = ["status", "product"]
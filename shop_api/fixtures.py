@@ -0,0 +1,186 @@
+import json
+import re
+from collections import Counter, defaultdict
+
+from django.core.management.color import no_style
+from django.core.serializers import python
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .analytics import rebuild_daily_sales
+from .cache import invalidate
+from .models import Collection, Order, OrderedProducts, Product, Review
+from .ratings import rebuild_ratings
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# An item cut by the end of the buffer fails to decode either as an unterminated
+# string or at most this many characters before the end: inside a partial
+# literal, number or \uXXXX escape.
+CUT_TOKEN_LENGTH = 6
+
+
+def is_cut(error):
+    return error.msg.startswith('Unterminated string') or len(error.doc) - error.pos <= CUT_TOKEN_LENGTH
+
+
+def iter_json_array(stream, read_size=1 << 16):
+    """
+    Yield the items of a top-level JSON array from a text stream, reading it
+    piece by piece instead of parsing the whole document at once.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position = '', 0
+    opened = after_item = False
+
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            chunk = stream.read(read_size)
+            if not chunk:
+                raise ValueError('Неожиданный конец фикстуры')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        char = buffer[position]
+        if not opened:
+            if char != '[':
+                raise ValueError('Фикстура должна быть JSON-массивом')
+            opened = True
+            position += 1
+        elif char == ']':
+            return
+        elif after_item:
+            if char != ',':
+                raise ValueError(f'Неожиданный символ {char!r} в фикстуре')
+            after_item = False
+            position += 1
+        else:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # An item cut by the end of the buffer is decoded again once more is
+                # read; any other error is reported without reading the rest of the file.
+                chunk = stream.read(read_size) if is_cut(error) else ''
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            after_item = True
+            yield item
+
+
+class FixtureLoader:
+    """
+    Inserts deserialized fixture objects with one multi-row INSERT per model and chunk.
+
+    Objects are inserted raw, like loaddata does, so dates stored in the fixture
+    are kept; auto_now fields missing from older fixtures get the current time.
+    Rows of auto-created M2M tables are collected from the objects and inserted
+    the same way. Constraint checks are left to the caller.
+    """
+
+    def __init__(self, chunk_size, using=DEFAULT_DB_ALIAS):
+        self.chunk_size = chunk_size
+        self.using = using
+        self.pending = defaultdict(list)
+        self.unpriced = []
+        self.counts = Counter()
+
+    def add(self, data):
+        for deserialized in python.Deserializer([data], using=self.using, ignorenonexistent=True):
+            instance = deserialized.object
+            for field in instance._meta.concrete_fields:
+                if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                    if getattr(instance, field.attname) is None:
+                        field.pre_save(instance, add=True)
+            self.queue(instance)
+
+            for name, pks in (deserialized.m2m_data or {}).items():
+                field = instance._meta.get_field(name)
+                through = field.remote_field.through
+                if not through._meta.auto_created:
+                    continue
+                source = through._meta.get_field(field.m2m_field_name()).attname
+                target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+                for pk in pks:
+                    self.queue(through(**{source: instance.pk, target: pk}))
+
+    def queue(self, instance):
+        model = type(instance)
+        self.pending[model].append(instance)
+        if len(self.pending[model]) >= self.chunk_size:
+            self.flush(model)
+
+    def flush(self, model):
+        instances = self.pending.pop(model, [])
+        if model is OrderedProducts:
+            instances = self.fill_unit_prices(instances)
+        if instances:
+            self.insert(model, instances)
+
+    def insert(self, model, instances):
+        connection = connections[self.using]
+        queryset = model._base_manager.using(self.using)
+        for with_pk in (True, False):
+            objs = [instance for instance in instances if (instance.pk is not None) == with_pk]
+            if not objs:
+                continue
+            fields = [field for field in model._meta.concrete_fields if with_pk or not field.primary_key]
+            batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+            for start in range(0, len(objs), batch_size):
+                queryset._insert(objs[start:start + batch_size], fields=fields, using=self.using, raw=True)
+        self.counts[model] += len(instances)
+
+    def flush_all(self):
+        for model in list(self.pending):
+            self.flush(model)
+        if self.unpriced:
+            # Every product is loaded now: the positions still without a price are errors.
+            positions, self.unpriced = self.unpriced, []
+            self.fill_unit_prices(positions)
+            if self.unpriced:
+                product_ids = sorted({position.product_id for position in self.unpriced})
+                raise ValueError(f'Позиции заказов ссылаются на отсутствующие товары: {product_ids}')
+            self.insert(OrderedProducts, positions)
+
+    def fill_unit_prices(self, positions):
+        """
+        Give the positions of fixtures made before the price snapshot the current
+        product price. Positions of products not loaded yet are held back in
+        self.unpriced until flush_all(); the others are returned for insertion.
+        """
+        missing = [position for position in positions if position.unit_price is None]
+        if not missing:
+            return positions
+        self.flush(Product)
+        prices = dict(
+            Product._base_manager.using(self.using)
+            .filter(id__in={position.product_id for position in missing})
+            .values_list('id', 'price')
+        )
+        for position in missing:
+            position.unit_price = prices.get(position.product_id)
+        self.unpriced += [position for position in missing if position.unit_price is None]
+        return [position for position in positions if position.unit_price is not None]
+
+    def reset_sequences(self):
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.counts))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def rebuild_aggregates(models):
+    """
+    Rebuild the data that signals and serializers keep up to date, after rows of
+    the given models were inserted around them.
+    """
+    if Review in models or Product in models:
+        rebuild_ratings()
+    if Order in models or OrderedProducts in models:
+        rebuild_daily_sales()
+    for model in (Product, Collection):
+        invalidate(model)
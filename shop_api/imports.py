@@ -0,0 +1,113 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+from rest_framework.response import Response
+
+from .cache import invalidate
+from .fastjson import ORJSONParser, loads
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily, one object per line. A line that is not valid
+    JSON is passed through as a string so that it is reported as an error of that row.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return iter(())
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return self.rows(stream, encoding)
+
+    def rows(self, stream, encoding):
+        for line in stream:
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                yield line
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class BulkUpsertMixin:
+    """
+    Adds POST .../bulk/ that creates or updates objects keyed by a unique field
+    with INSERT ... ON CONFLICT DO UPDATE, chunk by chunk, in one transaction.
+    Invalid rows are reported by their position and do not stop the others.
+    """
+
+    bulk_serializer_class = None
+    bulk_unique_field = None
+    bulk_chunk_size = 1000
+    # Optimistic locking counter raised on every updated row, so clients
+    # holding an older version cannot overwrite the imported values.
+    bulk_version_field = None
+
+    @action(detail=False, methods=['post'], parser_classes=[ORJSONParser, NDJSONParser])
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list) and not hasattr(rows, '__next__'):
+            raise ParseError('Ожидается массив объектов или NDJSON')
+
+        serializer = self.bulk_serializer_class()
+        model = serializer.Meta.model
+        result = {'created': 0, 'updated': 0, 'errors': []}
+
+        with transaction.atomic():
+            for chunk in chunks(enumerate(rows), self.bulk_chunk_size):
+                objects = {}
+                for index, row in chunk:
+                    try:
+                        data = serializer.run_validation(row)
+                    except ValidationError as exc:
+                        result['errors'].append({'index': index, 'errors': exc.detail})
+                    else:
+                        objects[data[self.bulk_unique_field]] = data
+                self.bulk_upsert(model, objects, result)
+        invalidate(model)
+        return Response(result, status=status.HTTP_200_OK)
+
+    def bulk_upsert(self, model, objects, result):
+        if not objects:
+            return
+        existing = model.objects.filter(**{f'{self.bulk_unique_field}__in': objects})
+        if self.bulk_version_field:
+            # Locked so that no update of these rows runs between the upsert and the version bump.
+            existing = list(existing.select_for_update().values_list(self.bulk_unique_field, flat=True))
+        else:
+            existing = list(existing.values_list(self.bulk_unique_field, flat=True))
+        result['created'] += len(objects) - len(existing)
+        result['updated'] += len(existing)
+
+        # Rows that omit optional fields must not overwrite them with defaults,
+        # so each set of supplied fields is written with its own statement.
+        groups = defaultdict(list)
+        for data in objects.values():
+            groups[tuple(sorted(data))].append(model(**data))
+        auto_now = [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        for fields, instances in groups.items():
+            model.objects.bulk_create(
+                instances,
+                update_conflicts=True,
+                unique_fields=[self.bulk_unique_field],
+                update_fields=[field for field in fields if field != self.bulk_unique_field] + auto_now,
+            )
+        if self.bulk_version_field and existing:
+            model.objects.filter(**{f'{self.bulk_unique_field}__in': existing}).update(
+                **{self.bulk_version_field: F(self.bulk_version_field) + 1}
+            )
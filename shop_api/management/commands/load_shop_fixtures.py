@@ -0,0 +1,41 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from shop_api.fixtures import FixtureLoader, iter_json_array, rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Потоково загружает большие фикстуры пачками INSERT вместо loaddata'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='+', help='Пути к JSON-фикстурам, в том числе .gz')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        loader = FixtureLoader(options['chunk_size'])
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            with connection.constraint_checks_disabled():
+                for path in options['fixtures']:
+                    opener = gzip.open if path.endswith('.gz') else open
+                    with opener(path, 'rt', encoding=options['encoding']) as stream:
+                        for number, data in enumerate(iter_json_array(stream), 1):
+                            loader.add(data)
+                            if options['verbosity'] > 1 and number % options['chunk_size'] == 0:
+                                self.stdout.write(f'{path}: прочитано объектов {number}')
+                loader.flush_all()
+            connection.check_constraints(table_names=[model._meta.db_table for model in loader.counts])
+            loader.reset_sequences()
+            rebuild_aggregates(loader.counts)
+        elapsed = time.perf_counter() - started
+
+        total = sum(loader.counts.values())
+        for model, count in sorted(loader.counts.items(), key=lambda item: item[0]._meta.label):
+            self.stdout.write(f'{model._meta.label}: {count}')
+        rate = total / max(elapsed, 1e-9)
+        self.stdout.write(f'Загружено объектов: {total} за {elapsed:.1f} с ({rate:.0f} объектов/с)')
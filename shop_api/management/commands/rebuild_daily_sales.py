@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop_api.analytics import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает дневную статистику продаж по позициям заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_daily_sales(options['batch_size'])
+        self.stdout.write(f'Обновлено строк статистики: {updated}')
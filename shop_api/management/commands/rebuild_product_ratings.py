@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from shop_api.models import Product
+from shop_api.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает среднюю оценку и количество отзывов товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Product.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            return
+
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            with transaction.atomic():
+                updated += rebuild_ratings(Product.objects.filter(id__gte=start, id__lt=start + batch_size))
+        self.stdout.write(f'Пересчитано товаров: {updated}')
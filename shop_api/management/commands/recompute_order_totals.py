@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from shop_api.models import Order
+from shop_api.orders import recompute_order_totals
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает общую сумму заказов по их позициям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Order.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            return
+
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            with transaction.atomic():
+                updated += recompute_order_totals(Order.objects.filter(id__gte=start, id__lt=start + batch_size))
+        self.stdout.write(f'Пересчитано заказов: {updated}')
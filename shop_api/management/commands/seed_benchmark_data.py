@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop_api.fixtures import FixtureLoader, rebuild_aggregates
+from shop_api.seeding import BenchmarkDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетические данные магазина заданного объёма для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=50000)
+        parser.add_argument('--orders', type=int, default=50000)
+        parser.add_argument('--collections', type=int, default=100)
+        parser.add_argument('--days', type=int, default=365, help='За сколько последних дней распределять даты')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        loader = FixtureLoader(options['chunk_size'])
+        generator = BenchmarkDataGenerator(loader, seed=options['seed'], days=options['days'])
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            generator.users(options['users'])
+            generator.products(options['products'])
+            generator.reviews(options['reviews'])
+            generator.orders(options['orders'])
+            generator.collections(options['collections'])
+            loader.reset_sequences()
+            rebuild_aggregates(loader.counts)
+        elapsed = time.perf_counter() - started
+
+        total = sum(loader.counts.values())
+        for model, count in sorted(loader.counts.items(), key=lambda item: item[0]._meta.label):
+            self.stdout.write(f'{model._meta.label}: {count}')
+        rate = total / max(elapsed, 1e-9)
+        self.stdout.write(f'Создано строк: {total} за {elapsed:.1f} с ({rate:.0f} строк/с)')
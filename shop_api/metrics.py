@@ -0,0 +1,240 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Counters of one request, found by record_query through current_metrics.
+    """
+
+    __slots__ = ('queries', 'sql_time', 'serializer_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    # Installed on every connection rather than per request: under ASGI the
+    # ORM runs in sync_to_async threads, each with its own connections, and
+    # the context variable follows the request into them.
+    # Inserted as the outermost wrapper: execute_wrapper() blocks pop the last one on exit.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class Histogram:
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        buckets, cumulative = {}, 0
+        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class RouteMetrics:
+
+    def __init__(self):
+        self.histograms = {
+            'total_ms': Histogram(TIME_BUCKETS_MS),
+            'sql_ms': Histogram(TIME_BUCKETS_MS),
+            'serializer_ms': Histogram(TIME_BUCKETS_MS),
+            'queries': Histogram(QUERY_BUCKETS),
+            'response_bytes': Histogram(SIZE_BUCKETS),
+        }
+
+    def observe(self, **values):
+        for name, value in values.items():
+            if value is not None:
+                self.histograms[name].observe(value)
+
+
+class MetricsRegistry:
+    """
+    Per-route histograms of the current process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route, **values):
+        with self.lock:
+            if route not in self.routes:
+                self.routes[route] = RouteMetrics()
+            self.routes[route].observe(**values)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                route: {name: histogram.as_dict() for name, histogram in metrics.histograms.items()}
+                for route, metrics in sorted(self.routes.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request, view_func):
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+class QueryMetricsMiddleware:
+    """
+    Records the query count, SQL time, serializer time and response size of
+    every request per view (viewset and action) and reports them in a
+    Server-Timing header. Queries run while a streaming response is being
+    consumed are not counted. Works in both sync and async middleware chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported.
+        for alias in connections:
+            install_query_recorder(connections[alias])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.report(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.report(request, response, metrics, time.perf_counter() - started)
+
+    def report(self, request, response, metrics, total):
+        registry.observe(
+            getattr(request, 'metrics_route', '<unresolved>'),
+            total_ms=total * 1000,
+            sql_ms=metrics.sql_time * 1000,
+            serializer_ms=metrics.serializer_time * 1000,
+            queries=metrics.queries,
+            response_bytes=None if response.streaming else len(response.content),
+        )
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries", '
+                f'ser;dur={metrics.serializer_time * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_route = route_name(request, view_func)
+
+
+def timed(to_representation):
+    @wraps(to_representation)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return to_representation(*args, **kwargs)
+        finally:
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.serializer_time += time.perf_counter() - started
+    return wrapper
+
+
+class SerializerTimingMixin:
+    """
+    Viewset mixin that makes the serializers it creates report the time spent
+    in to_representation (building .data) to QueryMetricsMiddleware.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        serializer.to_representation = timed(serializer.to_representation)
+        return serializer
+
+
+class MetricsView(APIView):
+    """
+    Request metrics histograms of this process, per route. DELETE resets them.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
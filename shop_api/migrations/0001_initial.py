@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:35
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True, verbose_name='Название товара')),
+                ('description', models.TextField(blank=True, verbose_name='Описание товара')),
+                ('price', models.PositiveIntegerField(verbose_name='Цена')),
+                ('created_at', models.DateField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Товар',
+                'verbose_name_plural': 'Товары',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('NEW', 'Новый'), ('IN_PROGRESS', 'В работе'), ('DONE', 'Выполнен')], default='NEW', max_length=11, verbose_name='Статус заказа')),
+                ('total_price', models.PositiveIntegerField(default=1, verbose_name='Общая сумма заказа')),
+                ('created_at', models.DateField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateField(auto_now=True, verbose_name='Дата обновления')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Заказчик')),
+            ],
+            options={
+                'verbose_name': 'Заказ',
+                'verbose_name_plural': 'Заказы',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderedProducts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество товара')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ordered_products', to='shop_api.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shop_api.product')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='positions',
+            field=models.ManyToManyField(through='shop_api.OrderedProducts', to='shop_api.product'),
+        ),
+        migrations.CreateModel(
+            name='Collection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=40, unique=True, verbose_name='Заголовок')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('created_at', models.DateField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateField(auto_now=True, verbose_name='Дата обновления')),
+                ('products', models.ManyToManyField(related_name='collections', to='shop_api.product', verbose_name='Товары в подборке')),
+            ],
+            options={
+                'verbose_name': 'Подборка',
+                'verbose_name_plural': 'Подборки',
+            },
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Текст отзыва')),
+                ('rating', models.SmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)], verbose_name='Оценка')),
+                ('created_at', models.DateField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateField(auto_now=True, verbose_name='Дата обновления')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shop_api.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Отзыв',
+                'verbose_name_plural': 'Отзывы',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reviews',
+            field=models.ManyToManyField(through='shop_api.Review', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:36
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('russian', coalesce({prefix}name, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce({prefix}description, '')), 'B')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION shop_api_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(prefix='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER shop_api_product_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, description ON shop_api_product
+FOR EACH ROW EXECUTE PROCEDURE shop_api_product_search_vector_update();
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER_SQL)
+    schema_editor.execute(f"UPDATE shop_api_product SET search_vector = {SEARCH_VECTOR_SQL.format(prefix='')}")
+    schema_editor.execute(
+        'CREATE INDEX shop_api_product_search_vector_gin ON shop_api_product USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS shop_api_product_search_vector_gin')
+    schema_editor.execute('DROP TRIGGER IF EXISTS shop_api_product_search_vector_trigger ON shop_api_product')
+    schema_editor.execute('DROP FUNCTION IF EXISTS shop_api_product_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop_api', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
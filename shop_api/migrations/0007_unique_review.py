@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+
+
+# Duplicates could only appear through the race in the old pre-insert check;
+# the earliest review of each user for a product is kept, and the rating
+# aggregates of the products that lost reviews are rebuilt.
+def remove_duplicate_reviews(apps, schema_editor):
+    Product = apps.get_model('shop_api', 'Product')
+    Review = apps.get_model('shop_api', 'Review')
+    first_reviews = Review.objects.values('user', 'product').annotate(first_id=Min('id')).values('first_id')
+    duplicates = Review.objects.exclude(id__in=first_reviews)
+    product_ids = set(duplicates.values_list('product_id', flat=True))
+    if not product_ids:
+        return
+    duplicates.delete()
+
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.filter(pk__in=product_ids).update(
+        review_count=Coalesce(Subquery(reviews.annotate(value=Count('id')).values('value')), 0),
+        rating_total=Coalesce(Subquery(reviews.annotate(value=Sum('rating')).values('value')), 0),
+        rating_avg=Coalesce(
+            Subquery(reviews.annotate(value=Avg('rating', output_field=FloatField())).values('value')), 0.0
+        ),
+        modified_at=Now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop_api', '0006_modified_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_review_per_product'),
+        ),
+    ]
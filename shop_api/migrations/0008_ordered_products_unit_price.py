@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:45
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_unit_price(apps, schema_editor):
+    OrderedProducts = apps.get_model('shop_api', 'OrderedProducts')
+    Product = apps.get_model('shop_api', 'Product')
+    OrderedProducts.objects.update(
+        unit_price=Subquery(Product.objects.filter(pk=OuterRef('product')).values('price'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop_api', '0007_unique_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderedproducts',
+            name='unit_price',
+            field=models.PositiveIntegerField(blank=True, default=0, verbose_name='Цена за единицу'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_unit_price, migrations.RunPython.noop),
+    ]
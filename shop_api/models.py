@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -30,10 +31,45 @@ class Product(models.Model):
         verbose_name='Дата обновления',
         auto_now=True,
     )
+    modified_at = models.DateTimeField(
+        verbose_name='Время изменения',
+        auto_now=True,
+        db_index=True
+    )
+    rating_avg = models.FloatField(
+        verbose_name='Средняя оценка',
+        default=0,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    rating_total = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['price']),
+            models.Index(fields=['rating_avg']),
+            models.Index(fields=['review_count']),
+        ]
 
     def __str__(self):
         return self.name
@@ -64,10 +100,23 @@ class Review(models.Model):
         verbose_name='Дата обновления',
         auto_now=True,
     )
+    modified_at = models.DateTimeField(
+        verbose_name='Время изменения',
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_review_per_product'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['product', 'created_at']),
+        ]
 
     def __str__(self):
         return f'{self.text}, {self.rating}'
@@ -116,10 +165,22 @@ class Order(models.Model):
         verbose_name='Дата обновления',
         auto_now=True,
     )
+    modified_at = models.DateTimeField(
+        verbose_name='Время изменения',
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'status', 'created_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['total_price']),
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f'Заказ пользователя {self.user} на сумму {self.total_price}'
@@ -140,6 +201,15 @@ class OrderedProducts(models.Model):
     quantity = models.PositiveIntegerField(
         verbose_name='Количество товара'
     )
+    unit_price = models.PositiveIntegerField(
+        verbose_name='Цена за единицу',
+        blank=True
+    )
+
+    def save(self, *args, **kwargs):
+        if self.unit_price is None:
+            self.unit_price = Product.objects.values_list('price', flat=True).get(pk=self.product_id)
+        super().save(*args, **kwargs)
 
 
 class Collection(models.Model):
@@ -168,10 +238,56 @@ class Collection(models.Model):
         verbose_name='Дата обновления',
         auto_now=True,
     )
+    modified_at = models.DateTimeField(
+        verbose_name='Время изменения',
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Подборка'
         verbose_name_plural = 'Подборки'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class DailySales(models.Model):
+    """
+    Sales of a product per day and order status, maintained incrementally by shop_api.analytics.
+    """
+
+    day = models.DateField(
+        verbose_name='День'
+    )
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Товар',
+        on_delete=models.CASCADE
+    )
+    status = models.CharField(
+        verbose_name='Статус заказа',
+        max_length=11,
+        choices=Order.STATUS_CHOICES
+    )
+    quantity = models.IntegerField(
+        verbose_name='Продано единиц',
+        default=0
+    )
+    revenue = models.BigIntegerField(
+        verbose_name='Выручка',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Продажи за день'
+        verbose_name_plural = 'Продажи по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product', 'status'], name='unique_daily_sales'),
+        ]
+
+    def __str__(self):
+        return f'{self.day}: {self.product} — {self.quantity} шт.'
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+
+from .exceptions import Locked
+from .models import OrderedProducts, Product
+
+
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def order_total():
+    positions = OrderedProducts.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    total = positions.annotate(total=Sum(F('quantity') * F('unit_price'))).values('total')
+    return Coalesce(Subquery(total), 0)
+
+
+def recompute_order_totals(orders):
+    """
+    Recompute total_price of the given orders with a single UPDATE ... SET total_price = (SELECT SUM(...)).
+    Positions carry their own unit_price, so the subquery reads one table.
+    """
+    return orders.update(total_price=order_total(), modified_at=Now())
+
+
+def lock_product_prices(product_ids):
+    """
+    Current prices of the products, read under row locks that are held until
+    the transaction commits, so a price cannot change while an order is placed.
+    The locks are taken in id order, so concurrent orders cannot deadlock.
+    FOR NO KEY UPDATE still lets other transactions insert rows that reference
+    the products (positions, reviews). On PostgreSQL the wait for a lock is
+    bounded by ORDER_LOCK_TIMEOUT_MS.
+    """
+    bounded = connection.vendor == 'postgresql'
+    if bounded:
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL lock_timeout = %s', [f'{settings.ORDER_LOCK_TIMEOUT_MS}ms'])
+    products = Product.objects.select_for_update(no_key=True).filter(id__in=product_ids).order_by('id')
+    try:
+        prices = dict(products.values_list('id', 'price'))
+    except OperationalError as exc:
+        if getattr(exc.__cause__, 'pgcode', None) == LOCK_NOT_AVAILABLE:
+            raise Locked()
+        raise
+    if bounded:
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL lock_timeout = DEFAULT')
+    return prices
@@ -0,0 +1,152 @@
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that filters on the whole ordering tuple instead of
+    its first field, so the position is always unique and no offsets are needed.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for async views: the page is fetched with the async ORM.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([item async for item in queryset])
+
+    def get_page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (self.reverse, self.current_position) = (False, None)
+        else:
+            (_, self.reverse, self.current_position) = self.cursor
+
+        if self.reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.current_position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.current_position, self.reverse))
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse, current_position = self.reverse, self.current_position
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, position, reverse):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        lookups = []
+        for order in self.ordering:
+            # Test for: (cursor reversed) XOR (field ordered descending)
+            lookups.append((order.lstrip('-'), 'lt' if reverse != order.startswith('-') else 'gt'))
+
+        keyset = Q()
+        for index, (attr, lookup) in enumerate(lookups):
+            condition = Q(**{f'{attr}__{lookup}': values[index]})
+            for (previous_attr, _), value in zip(lookups[:index], values):
+                condition &= Q(**{previous_attr: value})
+            keyset |= condition
+
+        # A non-strict bound on the leading field lets the database use
+        # the (created_at, id) index as a range scan.
+        first_attr, first_lookup = lookups[0]
+        return Q(**{f'{first_attr}__{first_lookup}e': values[0]}) & keyset
+
+    def get_ordering(self, request, queryset, view):
+        # An ordering applied by a filterset (e.g. ?ordering=) takes precedence.
+        ordering = tuple(order for order in queryset.query.order_by if isinstance(order, str))
+        if not ordering:
+            for backend in getattr(view, 'filter_backends', []):
+                if hasattr(backend, 'get_ordering'):
+                    ordering = backend().get_ordering(request, queryset, view)
+                    if ordering:
+                        break
+
+        ordering = ordering or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = list(ordering)
+
+        if not any(order.lstrip('-') in ('id', 'pk') for order in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            attr = order.lstrip('-')
+            value = instance[attr] if isinstance(instance, dict) else getattr(instance, attr)
+            values.append(str(value))
+        return json.dumps(values)
+
+
+def pagination_fields(view, queryset):
+    """
+    Names of the fields the view's paginator orders by and reads cursor
+    positions from, or an empty list when it does not paginate by cursor.
+    """
+    get_ordering = getattr(view.paginator, 'get_ordering', None)
+    if get_ordering is None:
+        return []
+    return [order.lstrip('-') for order in get_ordering(view.request, queryset, view)]
@@ -4,4 +4,4 @@ from rest_framework.permissions import BasePermission
 class IsOwnerOrAdmin(BasePermission):
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user or request.user.is_staff
\ No newline at end of file
+        return obj.user_id == request.user.pk or request.user.is_staff
\ No newline at end of file
@@ -0,0 +1,178 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\((?:%s, )+%s\)')
+WHITESPACE = re.compile(r'\s+')
+
+DRF_SERIALIZERS = os.path.join('rest_framework', 'serializers.py')
+FIELD_LOOPS = {'to_representation', 'to_internal_value'}
+SKIPPED_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics.py'),
+}
+
+
+def fingerprint(sql):
+    """
+    Shape of a statement: literals and IN lists are collapsed, so queries that
+    differ only in their parameters share a fingerprint.
+    """
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def query_origin():
+    """
+    The serializer field being rendered or validated and the first line of
+    project code on the stack.
+    """
+    field = location = None
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None and (field is None or location is None):
+        code = frame.f_code
+        if field is None and code.co_name in FIELD_LOOPS and code.co_filename.endswith(DRF_SERIALIZERS):
+            serializer, current = frame.f_locals.get('self'), frame.f_locals.get('field')
+            if current is not None:
+                field = f'{type(serializer).__name__}.{current.field_name}'
+        if (location is None and code.co_filename.startswith(base_dir)
+                and code.co_filename not in SKIPPED_FILES and 'site-packages' not in code.co_filename):
+            location = f'{os.path.relpath(code.co_filename, base_dir)}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return field, location
+
+
+class Offender:
+
+    def __init__(self, kind, fingerprint, count, total_ms, origins):
+        self.kind = kind
+        self.fingerprint = fingerprint
+        self.count = count
+        self.total_ms = total_ms
+        self.origins = origins
+
+    def __str__(self):
+        origins = '; '.join(
+            ' at '.join(part for part in origin if part) or 'unknown' for origin, _ in self.origins.most_common(3)
+        )
+        return f'{self.kind}: {self.count}× ({self.total_ms:.1f} ms) {self.fingerprint[:200]} — {origins}'
+
+
+class QueryInspector:
+    """
+    Execute wrapper that records the fingerprint, duration and origin of every query.
+    """
+
+    def __init__(self, threshold=None, slow_ms=None):
+        self.threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        self.slow_ms = slow_ms or settings.SLOW_QUERY_MS
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self.queries.append((fingerprint(sql), duration, query_origin()))
+
+    def installed(self):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    def offenders(self, queries=None):
+        groups = defaultdict(list)
+        for shape, duration, origin in self.queries if queries is None else queries:
+            groups[shape].append((duration, origin))
+
+        offenders = []
+        for shape, calls in groups.items():
+            if len(calls) >= self.threshold:
+                offenders.append(Offender('repeated query', shape, len(calls), sum(d for d, _ in calls),
+                                          Counter(origin for _, origin in calls)))
+            slow = [(duration, origin) for duration, origin in calls if duration >= self.slow_ms]
+            if slow:
+                offenders.append(Offender('slow query', shape, len(slow), sum(d for d, _ in slow),
+                                          Counter(origin for _, origin in slow)))
+        return sorted(offenders, key=lambda offender: -offender.total_ms)
+
+
+class RequestInspector(QueryInspector):
+    """
+    Inspects the queries of every request handled while it is active, using the
+    request_started and request_finished signals; queries outside of requests
+    (test setup, for example) are ignored. Offenders are collected per request.
+    """
+
+    def __init__(self, threshold=None, slow_ms=None):
+        super().__init__(threshold, slow_ms)
+        self.start = None
+        self.path = None
+        self.reports = []
+
+    def request_started(self, sender, environ=None, scope=None, **kwargs):
+        self.start = len(self.queries)
+        request = environ or scope or {}
+        self.path = request.get('PATH_INFO') or request.get('path')
+
+    def request_finished(self, sender, **kwargs):
+        if self.start is None:
+            return
+        offenders = self.offenders(self.queries[self.start:])
+        if offenders:
+            self.reports.append((self.path, offenders))
+        self.start = None
+
+    def __enter__(self):
+        self.stack = self.installed()
+        request_started.connect(self.request_started)
+        request_finished.connect(self.request_finished)
+        return self
+
+    def __exit__(self, *exc_info):
+        request_started.disconnect(self.request_started)
+        request_finished.disconnect(self.request_finished)
+        self.stack.close()
+
+    def format_reports(self):
+        return '\n'.join(
+            f'{path}\n' + '\n'.join(f'  {offender}' for offender in offenders)
+            for path, offenders in self.reports
+        )
+
+
+class QueryInspectionMiddleware:
+    """
+    For staging: logs repeated and slow queries of every request with the
+    serializer field or line of code that issued them. Too slow for production,
+    since it walks the stack on every query.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = QueryInspector()
+        with inspector.installed():
+            response = self.get_response(request)
+        for offender in inspector.offenders():
+            logger.warning('%s %s: %s', request.method, request.get_full_path(), offender)
+        return response
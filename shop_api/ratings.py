@@ -0,0 +1,55 @@
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Now
+
+from .cache import invalidate
+from .models import Product, Review
+
+
+def apply_rating_delta(product_id, count, total):
+    # Reviews written outside the API (admin, fixtures) are not counted until
+    # rebuild_product_ratings runs, so the counters are clamped at zero.
+    new_count = Greatest(F('review_count') + count, 0)
+    new_total = Greatest(F('rating_total') + total, 0)
+    Product.objects.filter(pk=product_id).update(
+        review_count=new_count,
+        rating_total=new_total,
+        rating_avg=Case(
+            When(review_count__lte=-count, then=Value(0.0)),
+            default=Cast(new_total, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+        modified_at=Now(),
+    )
+    invalidate(Product)
+
+
+def review_added(review):
+    apply_rating_delta(review.product_id, 1, review.rating)
+
+
+def review_removed(review):
+    apply_rating_delta(review.product_id, -1, -review.rating)
+
+
+def review_changed(review, old_product_id, old_rating):
+    if review.product_id != old_product_id:
+        apply_rating_delta(old_product_id, -1, -old_rating)
+        review_added(review)
+    elif review.rating != old_rating:
+        apply_rating_delta(review.product_id, 0, review.rating - old_rating)
+
+
+def rebuild_ratings(products=None):
+    if products is None:
+        products = Product.objects.all()
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    updated = products.update(
+        review_count=Coalesce(Subquery(reviews.annotate(value=Count('id')).values('value')), 0),
+        rating_total=Coalesce(Subquery(reviews.annotate(value=Sum('rating')).values('value')), 0),
+        rating_avg=Coalesce(
+            Subquery(reviews.annotate(value=Avg('rating', output_field=FloatField())).values('value')), 0.0
+        ),
+        modified_at=Now(),
+    )
+    invalidate(Product)
+    return updated
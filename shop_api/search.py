@@ -0,0 +1,89 @@
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+
+SEARCH_CONFIG = 'russian'
+
+# Same defaults as PostgreSQL's ts_rank for the A and B weight classes
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'description': 0.4,
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    In-memory full-text index used where PostgreSQL text search is not available.
+    Query tokens match indexed tokens by prefix, and every token must match.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+
+    def add(self, pk, text, weight):
+        for token in set(tokenize(text)):
+            postings = self.postings[token]
+            postings[pk] = postings.get(pk, 0.0) + weight
+
+    def search(self, query):
+        scores = None
+        for query_token in set(tokenize(query)):
+            token_scores = {}
+            for token, postings in self.postings.items():
+                if token.startswith(query_token):
+                    for pk, weight in postings.items():
+                        token_scores[pk] = max(token_scores.get(pk, 0.0), weight)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {pk: score + token_scores[pk] for pk, score in scores.items() if pk in token_scores}
+        return scores or {}
+
+
+def build_index(queryset):
+    index = InvertedIndex()
+    for pk, *values in queryset.values_list('pk', *FIELD_WEIGHTS).iterator():
+        for value, weight in zip(values, FIELD_WEIGHTS.values()):
+            index.add(pk, value, weight)
+    return index
+
+
+def search_products(queryset, query):
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        # ts_rank returns a real; casting to double keeps cursor positions exact.
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        )
+
+    tokens = set(tokenize(query))
+    if not tokens:
+        return queryset.none()
+    # Only products where every query token starts a word of a searched field
+    # are indexed and ranked; \b and the case folding of the regex are Unicode-aware.
+    candidates = Q()
+    for token in tokens:
+        pattern = r'\b' + re.escape(token)
+        matches = Q()
+        for field in FIELD_WEIGHTS:
+            matches |= Q(**{f'{field}__iregex': pattern})
+        candidates &= matches
+    scores = build_index(queryset.filter(candidates)).search(query)
+    return queryset.filter(pk__in=scores).annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
@@ -0,0 +1,142 @@
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Collection, Order, OrderedProducts, Product, Review
+
+
+NOUNS = ['Карниз', 'Штанга', 'Кронштейн', 'Наконечник', 'Профиль', 'Кольцо', 'Зажим', 'Держатель', 'Крючок']
+WORDS = ['металлический', 'квадро', 'хром', 'матовый', 'ряд', 'золото', 'латунь', 'белый', 'потолочный',
+         'настенный', 'антик', 'рифленая', 'гладкая', 'труба', 'сечения', 'мм', 'см', 'двухрядный']
+REVIEW_TEXTS = ['Отличный товар', 'Быстрая доставка', 'Цвет не совпал', 'Крепления слабые', 'Рекомендую']
+STATUS_WEIGHTS = {Order.NEW: 3, Order.IN_PROGRESS: 1, Order.DONE: 6}
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class BenchmarkDataGenerator:
+    """
+    Generates a reproducible shop dataset of the requested size and hands the rows
+    to a FixtureLoader, so they are written with multi-row INSERTs.
+
+    Dates are spread over the last `days` days, ratings are uneven, and orders
+    and collections favour a small set of popular products, so the filters and
+    the analytics rollup see realistic distributions.
+    """
+
+    def __init__(self, loader, seed=0, days=365):
+        self.loader = loader
+        self.rng = random.Random(seed)
+        self.days = days
+        self.today = timezone.localdate()
+        self.user_ids = range(0)
+        self.product_ids = range(0)
+        self.prices = []
+
+    def day(self):
+        return self.today - datetime.timedelta(days=self.rng.randrange(self.days))
+
+    def dates(self):
+        created_at = self.day()
+        updated_at = min(created_at + datetime.timedelta(days=self.rng.randrange(30)), self.today)
+        modified_at = datetime.datetime.combine(updated_at, datetime.time(), tzinfo=datetime.timezone.utc)
+        modified_at += datetime.timedelta(seconds=self.rng.randrange(86400))
+        return {'created_at': created_at, 'updated_at': updated_at, 'modified_at': modified_at}
+
+    def popular_product(self):
+        # Squaring a uniform number skews the choice towards the first products.
+        return int(len(self.product_ids) * self.rng.random() ** 2)
+
+    def users(self, count):
+        first = next_pk(User)
+        self.user_ids = range(first, first + count)
+        joined = timezone.now()
+        for pk in self.user_ids:
+            self.loader.queue(User(pk=pk, username=f'bench_{pk}', password='!', date_joined=joined))
+        self.loader.flush(User)
+
+    def products(self, count):
+        first = next_pk(Product)
+        self.product_ids = range(first, first + count)
+        for pk in self.product_ids:
+            price = self.rng.randint(100, 50000)
+            self.prices.append(price)
+            self.loader.queue(Product(
+                pk=pk,
+                name=f'{self.rng.choice(NOUNS)} {pk}',
+                description=' '.join(self.rng.choices(WORDS, k=self.rng.randint(5, 15))),
+                price=price,
+                **self.dates(),
+            ))
+        self.loader.flush(Product)
+
+    def reviews(self, count):
+        if not self.user_ids or not self.product_ids:
+            return
+        pk = next_pk(Review)
+        mean = count / len(self.product_ids)
+        for product_id in self.product_ids:
+            reviewers = min(round(mean * 2 * self.rng.random()), len(self.user_ids))
+            for user_id in self.rng.sample(self.user_ids, reviewers):
+                self.loader.queue(Review(
+                    pk=pk,
+                    user_id=user_id,
+                    product_id=product_id,
+                    text=self.rng.choice(REVIEW_TEXTS),
+                    rating=self.rng.choices(range(1, 6), weights=[1, 1, 2, 4, 6])[0],
+                    **self.dates(),
+                ))
+                pk += 1
+        self.loader.flush(Review)
+
+    def orders(self, count, max_positions=5):
+        if not self.user_ids or not self.product_ids:
+            return
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        first, position_pk = next_pk(Order), next_pk(OrderedProducts)
+        for order_pk in range(first, first + count):
+            indexes = {self.popular_product() for _ in range(self.rng.randint(1, max_positions))}
+            total_price = 0
+            for index in indexes:
+                quantity = self.rng.randint(1, 5)
+                total_price += quantity * self.prices[index]
+                self.loader.queue(OrderedProducts(
+                    pk=position_pk,
+                    order_id=order_pk,
+                    product_id=self.product_ids[index],
+                    quantity=quantity,
+                    unit_price=self.prices[index],
+                ))
+                position_pk += 1
+            self.loader.queue(Order(
+                pk=order_pk,
+                user_id=self.rng.choice(self.user_ids),
+                status=self.rng.choices(statuses, weights)[0],
+                total_price=total_price,
+                **self.dates(),
+            ))
+        self.loader.flush(Order)
+        self.loader.flush(OrderedProducts)
+
+    def collections(self, count, max_products=20):
+        if not self.product_ids:
+            return
+        through = Collection.products.through
+        first = next_pk(Collection)
+        for pk in range(first, first + count):
+            self.loader.queue(Collection(
+                pk=pk,
+                title=f'Подборка {pk}',
+                text=' '.join(self.rng.choices(WORDS, k=10)),
+                **self.dates(),
+            ))
+            indexes = {self.popular_product() for _ in range(self.rng.randint(1, max_products))}
+            for index in indexes:
+                self.loader.queue(through(collection_id=pk, product_id=self.product_ids[index]))
+        self.loader.flush(Collection)
+        self.loader.flush(through)
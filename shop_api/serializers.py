@@ -1,6 +1,13 @@
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from .models import Product, Review, Order, OrderedProducts, Collection
+from .analytics import order_changed, order_placed, position_lines, sales_lines
+from .exceptions import Conflict
+from .orders import lock_product_prices, recompute_order_totals
+from .ratings import review_added, review_changed
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -11,15 +18,62 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class ProductSerializer(serializers.ModelSerializer):
+
+    # Optimistic concurrency: an update carrying the version it was based on
+    # fails with 409 Conflict if the product has changed since. An update
+    # without a version is applied unconditionally and still bumps it.
+    version = serializers.IntegerField(
+        min_value=1,
+        required=False
+    )
+
     class Meta:
         model = Product
-        fields = ['name', 'description', 'price', 'created_at', 'updated_at']
+        fields = ['name', 'description', 'price', 'rating_avg', 'review_count', 'created_at', 'updated_at',
+                  'version']
 
     def validate_price(self, data):
         if data < 0:
             raise serializers.ValidationError('Цена не может быть негативной')
         return data
 
+    def create(self, validated_data):
+        validated_data.pop('version', None)
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        expected = validated_data.pop('version', None)
+        products = Product.objects.filter(pk=instance.pk)
+        if expected is None:
+            products.update(version=F('version') + 1)
+            instance.version = products.values_list('version', flat=True).get()
+        elif products.filter(version=expected).update(version=F('version') + 1):
+            instance.version = expected + 1
+        else:
+            raise Conflict()
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only the submitted fields are written: ratings change concurrently without a version bump.
+        instance.save(update_fields=[*validated_data, 'updated_at', 'modified_at'])
+        return instance
+
+
+class ProductBulkSerializer(ProductSerializer):
+    """
+    Row of a bulk import: products are matched by name, so its uniqueness is
+    resolved by the upsert instead of a query per row.
+    """
+
+    version = None
+
+    class Meta:
+        model = Product
+        fields = ['name', 'description', 'price']
+        extra_kwargs = {
+            'name': {'validators': []},
+        }
+
 
 class ReviewSerializer(serializers.ModelSerializer):
 
@@ -31,25 +85,137 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ['user', 'product', 'text', 'rating', 'created_at', 'updated_at']
 
+    @transaction.atomic
     def create(self, validated_data):
 
         validated_data["user"] = self.context["request"].user
-        return super().create(validated_data)
+        try:
+            # A savepoint, so the duplicate can still be looked up after the error.
+            with transaction.atomic():
+                review = super().create(validated_data)
+        except IntegrityError:
+            if self.is_duplicate(validated_data["user"].pk, validated_data["product"].pk):
+                raise self.duplicate_error()
+            raise
+        review_added(review)
+        return review
 
-    def validate(self, data):
-        user = self.context["request"].user
-        product = data.get("product")
-        check_duplicate = Review.objects.filter(user=user, product=product)
-        if check_duplicate.exists():
-            raise serializers.ValidationError('Нельзя оставлять более одного отзыва.')
-        return data
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        old_product_id, old_rating = instance.product_id, instance.rating
+        product_id = validated_data["product"].pk if "product" in validated_data else instance.product_id
+        try:
+            with transaction.atomic():
+                review = super().update(instance, validated_data)
+        except IntegrityError:
+            if self.is_duplicate(instance.user_id, product_id, exclude_pk=instance.pk):
+                raise self.duplicate_error()
+            raise
+        review_changed(review, old_product_id, old_rating)
+        return review
+
+    def is_duplicate(self, user_id, product_id, exclude_pk=None):
+        """
+        Whether the IntegrityError came from unique_review_per_product, i.e.
+        another review of the user for the product exists.
+        """
+        return Review.objects.filter(user_id=user_id, product_id=product_id).exclude(pk=exclude_pk).exists()
+
+    def duplicate_error(self):
+        return serializers.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: ['Нельзя оставлять более одного отзыва.']}
+        )
+
+
+def preloaded_key(data):
+    """
+    Product id a position's input is looked up by among the preloaded products,
+    or None for input left to PrimaryKeyRelatedField (which rejects booleans).
+    """
+    if isinstance(data, bool) or not isinstance(data, (int, str)):
+        return None
+    try:
+        return int(data)
+    except ValueError:
+        return None
+
+
+class PositionProductField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves products from the ones PositionListSerializer loaded for all
+    positions, falling back to a lookup of its own.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.loaded = {}
+
+    def to_internal_value(self, data):
+        product = self.loaded.get(preloaded_key(data))
+        if product is None:
+            return super().to_internal_value(data)
+        return product
+
+
+class PositionListSerializer(serializers.ListSerializer):
+    """
+    Loads the products of all positions in one query instead of one per position.
+    """
+
+    def to_internal_value(self, data):
+        product_ids = set()
+        if isinstance(data, list):
+            for position in data:
+                if isinstance(position, dict):
+                    product_ids.add(preloaded_key(position.get('product')))
+        product_ids.discard(None)
+        product_field = self.child.fields['product']
+        product_field.loaded = product_field.get_queryset().in_bulk(product_ids) if product_ids else {}
+        try:
+            return super().to_internal_value(data)
+        finally:
+            product_field.loaded = {}
 
 
 class OrderedProductsSerializer(serializers.ModelSerializer):
 
+    product = PositionProductField(
+        queryset=Product.objects.all()
+    )
+
     class Meta:
         model = OrderedProducts
         exclude = ['order']
+        read_only_fields = ['unit_price']
+        list_serializer_class = PositionListSerializer
+
+
+def build_positions(positions):
+    """
+    Turn validated positions into unsaved OrderedProducts with the current
+    product prices, locked until the order is committed (see lock_product_prices).
+    """
+    prices = lock_product_prices({position['product'].id for position in positions})
+    return [OrderedProducts(unit_price=prices[position['product'].id], **position) for position in positions]
+
+
+class PositionIdsField(serializers.ManyRelatedField):
+    """
+    Order.positions as product ids read from order.ordered_products, so
+    that a prefetch of the positions serves both fields without a join to Product.
+    Without the prefetch only the product ids of the positions are selected.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(child_relation=serializers.PrimaryKeyRelatedField(read_only=True), read_only=True, **kwargs)
+
+    def get_attribute(self, instance):
+        if 'ordered_products' in getattr(instance, '_prefetched_objects_cache', {}):
+            return [position.product_id for position in instance.ordered_products.all()]
+        return list(instance.ordered_products.order_by('pk').values_list('product_id', flat=True))
+
+    def to_representation(self, product_ids):
+        return product_ids
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -58,6 +224,8 @@ class OrderSerializer(serializers.ModelSerializer):
         many=True
     )
 
+    positions = PositionIdsField()
+
     user = UserSerializer(
         read_only=True
     )
@@ -65,21 +233,37 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['user', 'status', 'total_price', 'positions', 'created_at', 'updated_at', 'ordered_products']
+        read_only_fields = ['total_price']
 
+    @transaction.atomic
     def create(self, validated_data):
         validated_data["user"] = self.context["request"].user
+        positions = build_positions(validated_data.pop('ordered_products'))
+        validated_data["total_price"] = sum(position.unit_price * position.quantity for position in positions)
 
-        order_price = 0
-        for position in validated_data['ordered_products']:
-            queryset = Product.objects.filter(id=position['product'].id).values('price')
-            product_price = queryset[0]['price']
-            order_price += product_price * position['quantity']
-        validated_data["total_price"] = order_price
-
-        positions = validated_data.pop('ordered_products')
         order = Order.objects.create(**validated_data)
         for position in positions:
-            OrderedProducts.objects.create(order=order, **position)
+            position.order = order
+        OrderedProducts.objects.bulk_create(positions)
+        order_placed(order, position_lines(positions))
+        return order
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        positions = validated_data.pop('ordered_products', None)
+        old_status = instance.status
+        old_lines = lines = sales_lines(instance)
+        order = super().update(instance, validated_data)
+        if positions is not None:
+            positions = build_positions(positions)
+            for position in positions:
+                position.order = order
+            order.ordered_products.all().delete()
+            OrderedProducts.objects.bulk_create(positions)
+            recompute_order_totals(Order.objects.filter(pk=order.pk))
+            order.refresh_from_db(fields=['total_price', 'modified_at'])
+            lines = position_lines(positions)
+        order_changed(order, old_status, old_lines, lines)
         return order
 
     def validate_ordered_products(self, data):
@@ -95,3 +279,37 @@ class CollectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Collection
         fields = ['title', 'text', 'products', 'created_at', 'updated_at']
+
+
+class CollectionProductSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'price', 'rating_avg', 'review_count']
+
+
+class ExpandedCollectionSerializer(CollectionSerializer):
+    """
+    Collection with its products inlined (?expand=products), so that a
+    collection page needs no request per product.
+    """
+
+    products = CollectionProductSerializer(
+        many=True,
+        read_only=True
+    )
+
+
+class DailyRevenueSerializer(serializers.Serializer):
+
+    day = serializers.DateField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.IntegerField()
+
+
+class TopProductSerializer(serializers.Serializer):
+
+    product = serializers.IntegerField()
+    name = serializers.CharField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.IntegerField()
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .analytics import add_orders_to_rollup
+from .authentication import token_cache
+from .cache import invalidate
+from .models import Product, Collection, Order
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+def invalidate_catalogue(sender, **kwargs):
+    invalidate(sender)
+
+
+@receiver(pre_delete, sender=Product)
+def remember_product_collections(sender, instance, **kwargs):
+    # The cascade removes the product from its collections without m2m_changed.
+    instance._deleted_collection_ids = list(instance.collections.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Product)
+def touch_product_collections(sender, instance, **kwargs):
+    collection_ids = instance.__dict__.pop('_deleted_collection_ids', [])
+    if collection_ids:
+        Collection.objects.filter(pk__in=collection_ids).update(modified_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Collection.products.through)
+def invalidate_collection_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # post_clear carries no pk_set: remember the collections losing the product.
+        instance._cleared_collection_ids = list(instance.collections.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        collection_ids = [instance.pk]
+    elif action == 'post_clear':
+        collection_ids = instance.__dict__.pop('_cleared_collection_ids', [])
+    else:
+        collection_ids = pk_set
+    if collection_ids:
+        Collection.objects.filter(pk__in=collection_ids).update(modified_at=timezone.now())
+    invalidate(Collection)
+
+
+@receiver(post_delete, sender=Token)
+def evict_token(sender, instance, **kwargs):
+    # Evicted again on commit, in case a concurrent request cached the token
+    # from the rows this transaction has not committed the change to yet.
+    token_cache.delete(instance.key)
+    transaction.on_commit(lambda: token_cache.delete(instance.key))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user_tokens(sender, instance, **kwargs):
+    token_cache.delete_user(instance.pk)
+    transaction.on_commit(lambda: token_cache.delete_user(instance.pk))
+
+
+@receiver(pre_delete, sender=User)
+def remove_user_sales(sender, instance, **kwargs):
+    # The cascade deletes the user's orders without going through order_removed;
+    # this runs inside the deletion's transaction, before the positions are gone.
+    add_orders_to_rollup(Order.objects.filter(user=instance), sign=-1)
@@ -0,0 +1,88 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from .pagination import pagination_fields
+
+
+RELATION_FIELDS = (serializers.BaseSerializer, serializers.ManyRelatedField)
+
+
+def query_param_names(request, param):
+    return [name for value in request.query_params.getlist(param) for name in value.split(',') if name]
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets for read requests: ?fields=name,price keeps only the
+    listed serializer fields and ?omit=description drops the listed ones.
+    Besides the response, the query is narrowed: columns of omitted fields
+    are deferred, and omitted nested relations are neither joined nor prefetched.
+    """
+
+    sparse_fields = None
+
+    def get_sparse_fields(self):
+        """
+        Names of the fields to keep, or None when the response is not narrowed.
+        """
+        if self.sparse_fields is None:
+            self.sparse_fields = ()
+            if self.request is not None and self.request.method in SAFE_METHODS:
+                fields, omit = query_param_names(self.request, 'fields'), query_param_names(self.request, 'omit')
+                if fields or omit:
+                    names = list(self.get_serializer_class()().fields)
+                    unknown = [name for name in fields + omit if name not in names]
+                    if unknown:
+                        raise ValidationError({'fields': f'Неизвестные поля: {", ".join(unknown)}'})
+                    self.sparse_fields = tuple(name for name in names if name in (fields or names) and name not in omit)
+        return self.sparse_fields or None
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        kept = self.get_sparse_fields()
+        if kept is not None:
+            fields = serializer.child.fields if isinstance(serializer, serializers.ListSerializer) else serializer.fields
+            for name in list(fields):
+                if name not in kept:
+                    fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        kept = self.get_sparse_fields()
+        if kept is None:
+            return queryset
+        omitted = [field for name, field in self.get_serializer_class()().fields.items() if name not in kept]
+        return self.narrow_queryset(queryset, omitted)
+
+    def narrow_queryset(self, queryset, omitted):
+        relations = {field.source for field in omitted if isinstance(field, RELATION_FIELDS)}
+        if relations:
+            lookups = [
+                lookup for lookup in queryset._prefetch_related_lookups
+                if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup).split('__')[0] not in relations
+            ]
+            queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+            if isinstance(queryset.query.select_related, dict):
+                joined = [name for name in queryset.query.select_related if name not in relations]
+                queryset = queryset.select_related(None).select_related(*joined) if joined \
+                    else queryset.select_related(None)
+
+        # Columns needed besides the serialized ones (pagination cursors, the
+        # conditional GET version) stay loaded, or every row would fetch them.
+        opts = queryset.model._meta
+        needed = {opts.pk.name, 'modified_at', *(pagination_fields(self, queryset) if self.action == 'list' else [])}
+        deferred = []
+        for field in omitted:
+            if isinstance(field, RELATION_FIELDS) or field.source in needed:
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.is_relation:
+                deferred.append(field.source)
+        return queryset.defer(*deferred) if deferred else queryset
@@ -1,75 +1,193 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, Sum
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, SAFE_METHODS
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .filters import ProductFilter, ReviewFilter, OrderFilter
-from .models import Product, Review, Order, Collection
-from .serializers import ProductSerializer, ReviewSerializer, OrderSerializer, CollectionSerializer
+from .analytics import order_removed, sales_lines
+from .cache import VersionedCacheMixin
+from .conditional import ConditionalGetMixin, ConditionalRetrieveMixin
+from .export import ExportMixin
+from .fastlist import CompiledListMixin
+from .imports import BulkUpsertMixin
+from .metrics import SerializerTimingMixin
+from .filters import ProductFilter, ProductSearchFilter, ReviewFilter, OrderFilter, DailySalesFilter
+from .models import Product, Review, Order, OrderedProducts, Collection, DailySales
+from .serializers import (ProductSerializer, ProductBulkSerializer, ReviewSerializer, OrderSerializer,
+                          CollectionSerializer, CollectionProductSerializer, ExpandedCollectionSerializer,
+                          DailyRevenueSerializer, TopProductSerializer)
 from .permissions import IsOwnerOrAdmin
+from .ratings import review_removed
+from .sparse import SparseFieldsMixin
 
 
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(SerializerTimingMixin, CompiledListMixin, SparseFieldsMixin, BulkUpsertMixin,
+                     VersionedCacheMixin, ConditionalRetrieveMixin, ModelViewSet):
 
-    queryset = Product.objects.all()
+    queryset = Product.objects.defer('search_vector')
+    cache_models = (Product,)
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend]
+    bulk_serializer_class = ProductBulkSerializer
+    bulk_unique_field = 'name'
+    bulk_version_field = 'version'
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
     filterset_class = ProductFilter
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "bulk"]:
             return [IsAdminUser()]
         return []
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(SerializerTimingMixin, SparseFieldsMixin, ExportMixin, ConditionalGetMixin, ModelViewSet):
 
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = ReviewFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ["list", "retrieve", "export"]:
+            queryset = queryset.select_related('user')
+        return queryset
+
     def get_permissions(self):
         if self.action in ["create"]:
             return [IsAuthenticated()]
+        if self.action in ["export"]:
+            return [IsAdminUser()]
         if self.action in ["update", "partial_update", "destroy"]:
             return [IsOwnerOrAdmin()]
         return []
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        review_removed(instance)
+
 
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(SerializerTimingMixin, CompiledListMixin, SparseFieldsMixin, ExportMixin, ConditionalGetMixin,
+                   ModelViewSet):
 
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = OrderFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ["list", "retrieve", "export"]:
+            # Positions in the order they were added, as CompiledListMixin lists them;
+            # OrderSerializer.positions is read from the same prefetch.
+            queryset = queryset.select_related('user').prefetch_related(
+                Prefetch('ordered_products', queryset=OrderedProducts.objects.order_by('pk')),
+            )
+        if self.action == "list" and not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
     def get_permissions(self):
         if self.action in ["retrieve"]:
             return [IsOwnerOrAdmin()]
         if self.action in ["create", "list"]:
             return [IsAuthenticated()]
-        if self.action in ["update", "partial_update", "destroy"]:
+        if self.action in ["update", "partial_update", "destroy", "export"]:
             return [IsAdminUser()]
         return []
 
-    def list(self, request, *args, **kwargs):
-        if request.user.is_staff:
-            return super().list(request, *args, **kwargs)
-        else:
-            queryset = self.filter_queryset(self.get_queryset())
-            user_id = request.user.id
-            filtered_orders = queryset.filter(user=user_id)
-            serializer = OrderSerializer(filtered_orders, many=True)
-            return Response(serializer.data)
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        lines = sales_lines(instance)
+        instance.delete()
+        order_removed(instance, lines)
 
 
-class CollectionViewSet(ModelViewSet):
+class CollectionViewSet(SerializerTimingMixin, SparseFieldsMixin, VersionedCacheMixin, ConditionalRetrieveMixin,
+                        ModelViewSet):
 
     queryset = Collection.objects.all()
+    cache_models = (Collection, Product)
     serializer_class = CollectionSerializer
+    expandable_fields = ['products']
+
+    def get_expand(self):
+        if self.action not in ["list", "retrieve"]:
+            return set()
+        expand = {name for name in self.request.query_params.get('expand', '').split(',') if name}
+        if not expand <= set(self.expandable_fields):
+            raise ValidationError({'expand': f'Раскрыть можно только: {", ".join(self.expandable_fields)}'})
+        return expand
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ["list", "retrieve"]:
+            if 'products' in self.get_expand():
+                # modified_at versions the detail response, see get_conditional_state.
+                products = Product.objects.only(*CollectionProductSerializer.Meta.fields, 'modified_at')
+            else:
+                products = Product.objects.only('id')
+            queryset = queryset.prefetch_related(Prefetch('products', queryset=products))
+        return queryset
+
+    def get_serializer_class(self):
+        if 'products' in self.get_expand():
+            return ExpandedCollectionSerializer
+        return super().get_serializer_class()
+
+    def get_conditional_state(self, instance):
+        state, last_modified = super().get_conditional_state(instance)
+        if 'products' in self.get_expand():
+            # Ratings are updated without touching modified_at, so the inlined values are part of the state.
+            products = instance.products.all()
+            last_modified = max([last_modified, *(product.modified_at for product in products)])
+            fields = CollectionProductSerializer.Meta.fields
+            state = f'{state}:{[[getattr(product, name) for name in fields] for product in products]}'
+        return state, last_modified
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsAdminUser()]
         return []
+
+
+class SalesAnalyticsViewSet(GenericViewSet):
+    """
+    Revenue and top products over ?date_after=&date_before=, answered from the DailySales rollup.
+    """
+
+    queryset = DailySales.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = DailySalesFilter
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+
+    def list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        days = queryset.values('day').annotate(quantity=Sum('quantity'), revenue=Sum('revenue')).order_by('day')
+        totals = queryset.aggregate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+        return Response({
+            'quantity': totals['quantity'] or 0,
+            'revenue': totals['revenue'] or 0,
+            'days': DailyRevenueSerializer(days, many=True).data,
+        })
+
+    @action(detail=False, url_path='top-products')
+    def top_products(self, request):
+        order_by = request.query_params.get('order_by', 'revenue')
+        if order_by not in ('revenue', 'quantity'):
+            raise ValidationError({'order_by': ['Допустимые значения: revenue, quantity.']})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), settings.MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({'limit': ['Ожидается целое число.']})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        products = queryset.values('product', name=F('product__name')).annotate(
+            quantity=Sum('quantity'), revenue=Sum('revenue')
+        ).order_by(f'-{order_by}', 'product')[:limit]
+        return Response(TopProductSerializer(products, many=True).data)
@@ -1,7 +1,51 @@
 import pytest
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework.test import APIClient
 from model_bakery import baker
 
+from shop_api.authentication import token_cache
+from shop_api.querycheck import RequestInspector
+
+
+def pytest_configure(config):
+    # The tests run in a single process, so a local-memory cache stands in for
+    # the shared backend of the settings and cache hits run no queries.
+    override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}).enable()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--n-plus-one", type=int, default=None, metavar="THRESHOLD",
+        help="Fail tests whose API requests repeat a query of the same shape THRESHOLD or more times",
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def n_plus_one_guard(request):
+    threshold = request.config.getoption("--n-plus-one")
+    if threshold is None:
+        yield
+        return
+    with RequestInspector(threshold=threshold, slow_ms=float("inf")) as inspector:
+        yield
+    # Only the API is held to the threshold; the admin pages repeat queries of their own.
+    inspector.reports = [(path, offenders) for path, offenders in inspector.reports if path.startswith('/api/')]
+    if inspector.reports:
+        pytest.fail("Repeated queries:\n" + inspector.format_reports(), pytrace=False)
+
+
+@pytest.fixture()
+def query_inspector():
+    with RequestInspector() as inspector:
+        yield inspector
+
 
 @pytest.fixture()
 def api_client():
@@ -0,0 +1,139 @@
+import datetime
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+
+from shop_api.analytics import apply_sales_delta
+from shop_api.models import DailySales, Order
+
+
+def rollup():
+    return sorted(DailySales.objects.values_list('product_id', 'status', 'quantity', 'revenue'))
+
+
+def place_order(api_client, user, *positions):
+    api_client.force_authenticate(user)
+    payload = {"ordered_products": [{"product": product.id, "quantity": quantity} for product, quantity in positions]}
+    response = api_client.post(reverse("orders-list"), payload, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    return Order.objects.latest('id')
+
+
+@pytest.mark.django_db
+def test_rollup_follows_order_lifecycle(api_client, user_factory, product_factory):
+    admin = user_factory(is_staff=True)
+    first_product = product_factory(price=10)
+    second_product = product_factory(price=25)
+    order = place_order(api_client, user_factory(), (first_product, 2), (second_product, 1))
+    place_order(api_client, user_factory(), (first_product, 3))
+    assert rollup() == [(first_product.id, "NEW", 5, 50), (second_product.id, "NEW", 1, 25)]
+
+    api_client.force_authenticate(admin)
+    url = reverse("orders-detail", args=[order.id])
+    response = api_client.patch(url, {"status": "DONE"}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert rollup() == [(first_product.id, "DONE", 2, 20), (first_product.id, "NEW", 3, 30),
+                        (second_product.id, "DONE", 1, 25)]
+
+    response = api_client.patch(url, {"ordered_products": [{"product": second_product.id, "quantity": 4}]},
+                                format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert rollup() == [(first_product.id, "NEW", 3, 30), (second_product.id, "DONE", 4, 100)]
+
+    response = api_client.delete(url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert rollup() == [(first_product.id, "NEW", 3, 30)]
+
+
+@pytest.mark.django_db
+def test_user_deletion_removes_their_sales(api_client, user_factory, product_factory):
+    product = product_factory(price=10)
+    user = user_factory()
+    place_order(api_client, user, (product, 2))
+    place_order(api_client, user, (product, 1))
+    place_order(api_client, user_factory(), (product, 3))
+    user.delete()
+    assert rollup() == [(product.id, "NEW", 3, 30)]
+
+
+@pytest.mark.django_db
+def test_sales_delta_upserted_in_key_order(product_factory):
+    products = product_factory(_quantity=3)
+    day = datetime.date(2024, 1, 1)
+    delta = {
+        (day + datetime.timedelta(days=offset), product.id, "NEW"): [1, 10]
+        for offset in (1, 0) for product in reversed(products)
+    }
+    executed = []
+
+    def capture(execute, sql, params, many, context):
+        executed.append(params)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        apply_sales_delta(delta)
+    keys = [(params[i], params[i + 1]) for params in executed for i in range(0, len(params), 5)]
+    assert keys == sorted(keys)
+    assert len(keys) == 6
+
+
+@pytest.mark.django_db
+def test_rebuild_daily_sales_command(api_client, user_factory, product_factory, order_factory):
+    product = product_factory(price=40)
+    place_order(api_client, user_factory(), (product, 1))
+    order_factory(_quantity=3, status="DONE", ordered_products__product=product, ordered_products__quantity=2)
+    DailySales.objects.update(quantity=100)
+    call_command("rebuild_daily_sales", batch_size=2, stdout=io.StringIO())
+    assert rollup() == [(product.id, "DONE", 6, 240), (product.id, "NEW", 1, 40)]
+
+
+@pytest.mark.django_db
+def test_analytics_staff_only(api_client, user_factory):
+    url = reverse("analytics-list")
+    assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+    api_client.force_authenticate(user_factory())
+    assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_analytics_revenue(api_client, user_factory, product_factory):
+    product = product_factory(price=10)
+    today = datetime.date.today()
+    DailySales.objects.create(day=today - datetime.timedelta(days=3), product=product, status="DONE",
+                              quantity=1, revenue=10)
+    DailySales.objects.create(day=today, product=product, status="DONE", quantity=2, revenue=20)
+    DailySales.objects.create(day=today, product=product, status="NEW", quantity=5, revenue=50)
+    api_client.force_authenticate(user_factory(is_staff=True))
+    response = api_client.get(reverse("analytics-list"), {"status": "DONE",
+                                                          "date_after": today - datetime.timedelta(days=1)})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "quantity": 2,
+        "revenue": 20,
+        "days": [{"day": today.isoformat(), "quantity": 2, "revenue": 20}],
+    }
+
+
+@pytest.mark.django_db
+def test_analytics_top_products(api_client, user_factory, product_factory):
+    products = product_factory(_quantity=3)
+    today = datetime.date.today()
+    for product, (quantity, revenue) in zip(products, [(10, 100), (1, 500), (5, 50)]):
+        DailySales.objects.create(day=today, product=product, status="DONE", quantity=quantity, revenue=revenue)
+    api_client.force_authenticate(user_factory(is_staff=True))
+    url = reverse("analytics-top-products")
+
+    response = api_client.get(url, {"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert [row["product"] for row in response.json()] == [products[1].id, products[0].id]
+    assert response.json()[0] == {"product": products[1].id, "name": products[1].name, "quantity": 1,
+                                  "revenue": 500}
+
+    response = api_client.get(url, {"order_by": "quantity"})
+    assert [row["product"] for row in response.json()] == [products[0].id, products[2].id, products[1].id]
+
+    assert api_client.get(url, {"order_by": "name"}).status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,88 @@
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+
+make = sync_to_async(baker.make)
+
+
+# Django's TestCase runs async def tests in an event loop, and AsyncClient sends
+# the requests through the ASGI handler, so the views run as they do under ASGI.
+class AsyncApiTests(TestCase):
+
+    async def get_json(self, url, data=None):
+        response = await self.async_client.get(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    async def test_product_list_matches_sync(self):
+        await make("Product", _quantity=5)
+        async_json = await self.get_json(reverse("async-products-list"))
+        sync_json = await self.get_json(reverse("products-list"))
+        self.assertEqual(async_json, sync_json)
+
+    async def test_product_list_pagination(self):
+        products = await make("Product", _quantity=5)
+        response_json = await self.get_json(reverse("async-products-list"), {"page_size": 3})
+        self.assertIsNone(response_json['previous'])
+        names = [item['name'] for item in response_json['results']]
+        response_json = await self.get_json(response_json['next'])
+        names += [item['name'] for item in response_json['results']]
+        self.assertIsNone(response_json['next'])
+        self.assertEqual(sorted(names), sorted(product.name for product in products))
+
+        response = await self.async_client.get(reverse("async-products-list"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_product_list_filter_and_ordering(self):
+        await make("Product", price=100)
+        await make("Product", price=500)
+        await make("Product", price=300)
+        response_json = await self.get_json(reverse("async-products-list"), {"price_min": 200, "ordering": "price"})
+        self.assertEqual([item['price'] for item in response_json['results']], [300, 500])
+
+        response = await self.async_client.get(reverse("async-products-list"), {"ordering": "unknown"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_product_list_search(self):
+        await make("Product", name="Карниз потолочный", description="")
+        await make("Product", name="Штора", description="Для карниза")
+        await make("Product", name="Ламбрекен", description="")
+        params = {"search": "карниз"}
+        async_json = await self.get_json(reverse("async-products-list"), params)
+        sync_json = await self.get_json(reverse("products-list"), params)
+        self.assertEqual([item['name'] for item in async_json['results']], ["Карниз потолочный", "Штора"])
+        self.assertEqual(async_json, sync_json)
+
+    async def test_unsupported_params_rejected(self):
+        response = await self.async_client.get(reverse("async-products-list"), {"fields": "name"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.json())
+        response = await self.async_client.get(reverse("async-collections-list"), {"expand": "products"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_product_detail(self):
+        product = await make("Product")
+        response_json = await self.get_json(reverse("async-products-detail", args=[product.id]))
+        self.assertEqual(response_json, await self.get_json(reverse("products-detail", args=[product.id])))
+
+        response = await self.async_client.get(reverse("async-products-detail", args=[product.id + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_collection_list_and_detail_match_sync(self):
+        products = await make("Product", _quantity=3)
+        collection = await make("Collection", products=products)
+        await make("Collection")
+        async_json = await self.get_json(reverse("async-collections-list"))
+        sync_json = await self.get_json(reverse("collections-list"))
+        self.assertEqual(async_json, sync_json)
+
+        async_json = await self.get_json(reverse("async-collections-detail", args=[collection.id]))
+        sync_json = await self.get_json(reverse("collections-detail", args=[collection.id]))
+        self.assertEqual(async_json, sync_json)
+
+    async def test_write_not_allowed(self):
+        response = await self.async_client.post(reverse("async-products-list"), {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,67 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from shop_api.authentication import TokenCache
+
+
+@pytest.mark.django_db
+def test_token_lookup_cached(api_client, user_factory, token_factory, django_assert_num_queries):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    url = reverse("orders-list")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    with django_assert_num_queries(3):
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    with django_assert_num_queries(2):
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_deleted_token_rejected(api_client, user_factory, token_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    url = reverse("orders-list")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    assert api_client.get(url).status_code == status.HTTP_200_OK
+    token.delete()
+    assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_deactivated_user_rejected(api_client, user_factory, token_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    url = reverse("orders-list")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    assert api_client.get(url).status_code == status.HTTP_200_OK
+    user.is_active = False
+    user.save()
+    assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_shared_cache_revocation_reaches_other_workers(user_factory, token_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    worker, other_worker = TokenCache(10, 60, shared=True), TokenCache(10, 60, shared=True)
+    worker.set(token.key, (user, token))
+    assert other_worker.get(token.key)[0].pk == user.pk
+    other_worker.delete_user(user.pk)
+    assert worker.get(token.key) is None
+
+
+@pytest.mark.django_db
+def test_cached_user_not_shared_between_requests(user_factory, token_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    cache = TokenCache(10, 60)
+    cache.set(token.key, (user, token))
+    (first_user, first_token), (second_user, _) = cache.get(token.key), cache.get(token.key)
+    assert first_user is not second_user and first_user is not user
+    assert (first_user.pk, first_user.username, first_token.key, first_token.user) == \
+        (user.pk, user.username, token.key, first_user)
+    cache.delete_user(user.pk)
+    assert cache.get(token.key) is None
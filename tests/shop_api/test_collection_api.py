@@ -1,7 +1,10 @@
 import pytest
+from datetime import datetime, timezone
 from django.urls import reverse
 from rest_framework import status
 
+from shop_api.models import Collection, Product
+
 
 @pytest.mark.django_db
 def test_retrieve(api_client, collection_factory):
@@ -22,7 +25,7 @@ def test_list(api_client, collection_factory):
     response = api_client.get(url)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == 10
+    assert len(response_json['results']) == 10
 
 
 @pytest.mark.parametrize(
@@ -86,3 +89,103 @@ def test_delete_permission(api_client, user_factory, token_factory, admin_user,
     api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
     response = api_client.delete(url)
     assert response.status_code == http_response
+
+
+@pytest.mark.django_db
+def test_list_cache_invalidated_by_products_change(api_client, collection_factory, product_factory):
+    collection = collection_factory()
+    product = product_factory()
+    url = reverse('collections-list')
+    response = api_client.get(url)
+    assert response.json()['results'][0]['products'] == []
+
+    collection.products.add(product)
+    response = api_client.get(url)
+    assert response.json()['results'][0]['products'] == [product.id]
+
+
+@pytest.mark.django_db
+def test_expand_products(api_client, collection_factory, product_factory, query_inspector):
+    products = product_factory(_quantity=5, rating_avg=4.5)
+    collections = collection_factory(_quantity=3)
+    for collection in collections:
+        collection.products.set(products[:4])
+
+    response = api_client.get(reverse('collections-list'), {'expand': 'products'})
+    assert response.status_code == status.HTTP_200_OK
+    expanded = response.json()['results'][0]['products']
+    assert [product['id'] for product in expanded] == [product.id for product in products[:4]]
+    assert expanded[0] == {
+        'id': products[0].id, 'name': products[0].name, 'price': products[0].price,
+        'rating_avg': 4.5, 'review_count': products[0].review_count,
+    }
+    assert api_client.get(reverse('collections-list')).json()['results'][0]['products'] == \
+        [product.id for product in products[:4]]
+
+    url = reverse('collections-detail', args=[collections[0].id])
+    response = api_client.get(url, {'expand': 'products'})
+    assert response.json()['products'] == expanded
+    assert query_inspector.reports == []
+
+    assert api_client.get(url, {'expand': 'reviews'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_expanded_detail_etag_follows_products(api_client, collection_factory, product_factory):
+    product = product_factory(rating_avg=3.0)
+    collection = collection_factory()
+    collection.products.add(product)
+    url = reverse('collections-detail', args=[collection.id])
+
+    etag = api_client.get(url, {'expand': 'products'})['ETag']
+    response = api_client.get(url, {'expand': 'products'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    Product.objects.filter(pk=product.pk).update(rating_avg=5.0)
+    response = api_client.get(url, {'expand': 'products'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['products'][0]['rating_avg'] == 5.0
+
+
+@pytest.mark.django_db
+def test_retrieve_conditional_get(api_client, collection_factory):
+    collection = collection_factory()
+    url = reverse('collections-detail', args=[collection.id])
+    response = api_client.get(url)
+    etag = response['ETag']
+    assert response['Last-Modified']
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = api_client.get(url, HTTP_IF_MATCH='"stale"')
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+@pytest.mark.django_db
+def test_retrieve_modified_by_product_collections_clear(api_client, collection_factory, product_factory):
+    product = product_factory()
+    collection = collection_factory()
+    collection.products.add(product)
+    # Back in time, so the clear below lands in a later second than Last-Modified.
+    Collection.objects.filter(pk=collection.pk).update(modified_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+    url = reverse('collections-detail', args=[collection.id])
+    last_modified = api_client.get(url)['Last-Modified']
+    response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    product.collections.clear()
+    response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['products'] == []
+
+
+@pytest.mark.django_db
+def test_retrieve_modified_by_product_delete(api_client, collection_factory, product_factory):
+    products = product_factory(_quantity=2)
+    collection = collection_factory(products=products)
+    url = reverse('collections-detail', args=[collection.id])
+    etag = api_client.get(url)['ETag']
+
+    products[0].delete()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['products'] == [products[1].id]
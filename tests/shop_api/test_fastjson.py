@@ -0,0 +1,78 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from shop_api import fastjson
+from shop_api.fastjson import ORJSONParser, ORJSONRenderer
+
+
+PAYLOAD = {
+    "text": "Отзыв с разделителем строк\u2028и абзацев\u2029",
+    "date": datetime.date(2024, 2, 29),
+    "created": datetime.datetime(2024, 2, 29, 12, 30, 5, 123456, tzinfo=datetime.timezone.utc),
+    "naive": datetime.datetime(2024, 2, 29, 12, 30),
+    "price": decimal.Decimal("10.50"),
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("Not found."),
+    "counts": {1: 2, "3": [1.5, None, True]},
+}
+
+
+def test_renderer_matches_json_renderer():
+    assert ORJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+    assert ORJSONRenderer().render({"big": 2 ** 70}) == JSONRenderer().render({"big": 2 ** 70})
+    assert ORJSONRenderer().render(None) == b""
+    assert ORJSONRenderer().render([1], "application/json; indent=4") == b"[\n    1\n]"
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf"), decimal.Decimal("NaN")])
+def test_renderer_rejects_non_finite(value):
+    data = {"results": [{"rating_avg": 4.5, "previous": None}, {"rating_avg": [value]}]}
+    with pytest.raises(ValueError):
+        JSONRenderer().render(data)
+    with pytest.raises(ValueError):
+        ORJSONRenderer().render(data)
+
+
+def test_fallback_without_orjson(monkeypatch):
+    monkeypatch.setattr(fastjson, "orjson", None)
+    assert ORJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+    assert ORJSONParser().parse(io.BytesIO('{"a": "б"}'.encode())) == {"a": "б"}
+
+
+def test_parser():
+    body = '{"name": "Товар", "price": 1.5, "tags": [null, true]}'.encode()
+    assert ORJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+    for invalid in (b"{", b"", b'{"a": NaN}'):
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(io.BytesIO(invalid))
+    body = '{"name": "Товар"}'.encode("cp1251")
+    assert ORJSONParser().parse(io.BytesIO(body), parser_context={"encoding": "cp1251"}) == {"name": "Товар"}
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_renderer(api_client, user_factory, product_factory):
+    product = product_factory(name="Чайник")
+    api_client.force_authenticate(user_factory(is_staff=True))
+    response = api_client.get(reverse("products-list"))
+    assert response.status_code == status.HTTP_200_OK
+    assert isinstance(response.accepted_renderer, ORJSONRenderer)
+    assert response.content == JSONRenderer().render(response.data)
+
+    response = api_client.patch(reverse("products-detail", args=[product.id]), '{"price": 7}',
+                                content_type="application/json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["price"] == 7
+    response = api_client.patch(reverse("products-detail", args=[product.id]), '{"price": ',
+                                content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"].startswith("JSON parse error - ")
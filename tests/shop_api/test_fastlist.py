@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import serializers
+
+from shop_api.fastlist import CompiledSerializer, compiled_serializer
+from shop_api.models import Order, OrderedProducts, Product
+from shop_api.serializers import OrderSerializer, ProductSerializer
+
+
+def assert_same_output(compiled, expected):
+    assert json.dumps(compiled, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+@pytest.mark.django_db
+def test_product_rows_match_serializer(product_factory):
+    product_factory(_quantity=3)
+    product_factory(description="", rating_avg=4.5, review_count=2)
+    queryset = Product.objects.order_by("-id")
+    compiled = compiled_serializer(ProductSerializer)
+    assert_same_output(
+        compiled.serialize(list(queryset.values(*compiled.columns))),
+        ProductSerializer(queryset, many=True).data,
+    )
+
+
+@pytest.mark.django_db
+def test_order_rows_match_serializer(user_factory, product_factory):
+    products = product_factory(_quantity=3)
+    orders = [
+        baker.make("Order", user=user_factory(first_name="Анна", last_name=""), status=Order.DONE),
+        baker.make("Order", user=user_factory()),
+        baker.make("Order", user=user_factory()),
+    ]
+    for order, positions in zip(orders, ([2, 0, 1, 0], [1], [])):
+        for index in positions:
+            OrderedProducts.objects.create(order=order, product=products[index], quantity=index + 1)
+
+    queryset = Order.objects.order_by("id")
+    compiled = compiled_serializer(OrderSerializer)
+    instances = queryset.select_related("user").prefetch_related(
+        Prefetch("ordered_products", queryset=OrderedProducts.objects.order_by("pk")),
+        Prefetch("positions", queryset=Product.objects.order_by("orderedproducts")),
+    )
+    data = compiled.serialize(list(queryset.values(*compiled.columns)))
+    assert data[0]["positions"] == [products[index].id for index in (2, 0, 1, 0)]
+    assert data[2]["ordered_products"] == []
+    assert_same_output(data, OrderSerializer(instances, many=True).data)
+
+
+@pytest.mark.django_db
+def test_list_endpoints_match_serializer(api_client, user_factory, order_factory, product_factory):
+    products = product_factory(_quantity=5)
+    for order in order_factory(_quantity=5):
+        OrderedProducts.objects.create(order=order, product=products[order.id % 5], quantity=2)
+    api_client.force_authenticate(user_factory(is_staff=True))
+
+    response = api_client.get(reverse("products-list"), {"page_size": 2, "ordering": "-price"})
+    expected = Product.objects.order_by("-price", "-id")
+    assert_same_output(response.json()["results"], ProductSerializer(expected[:2], many=True).data)
+    response = api_client.get(response.json()["next"])
+    assert_same_output(response.json()["results"], ProductSerializer(expected[2:4], many=True).data)
+
+    response = api_client.get(reverse("orders-list"), {"page_size": 3})
+    expected = [api_client.get(reverse("orders-detail", args=[item["id"]])).json()
+                for item in Order.objects.order_by("-created_at", "-id").values("id")[:3]]
+    assert_same_output(response.json()["results"], expected)
+
+
+def test_unsupported_field():
+    class Serializer(serializers.ModelSerializer):
+        label = serializers.SerializerMethodField()
+
+        class Meta:
+            model = Product
+            fields = ["name", "label"]
+
+    with pytest.raises(ImproperlyConfigured):
+        CompiledSerializer(Serializer)
@@ -0,0 +1,114 @@
+import datetime
+import io
+import json
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Sum
+
+from shop_api.fixtures import iter_json_array
+from shop_api.models import Collection, DailySales, Order, OrderedProducts, Product, Review
+
+
+FIXTURE = [
+    {"model": "shop_api.product", "pk": 10,
+     "fields": {"name": "Карниз", "description": "Однорядный", "price": 100,
+                "created_at": "2021-06-08", "updated_at": "2021-06-09"}},
+    {"model": "shop_api.product", "pk": 11, "fields": {"name": "Штора", "price": 300}},
+    {"model": "auth.user", "pk": 5, "fields": {"username": "buyer", "password": "!", "groups": [],
+                                               "user_permissions": []}},
+    {"model": "shop_api.order", "pk": 7,
+     "fields": {"user": 5, "status": "DONE", "total_price": 500, "created_at": "2021-07-01"}},
+    {"model": "shop_api.orderedproducts", "pk": 1, "fields": {"order": 7, "product": 10, "quantity": 2}},
+    {"model": "shop_api.orderedproducts", "pk": 2, "fields": {"order": 7, "product": 11, "quantity": 1}},
+    {"model": "shop_api.review", "pk": 3, "fields": {"user": 5, "product": 10, "text": "Хорошо", "rating": 4}},
+    {"model": "shop_api.collection", "pk": 2,
+     "fields": {"title": "Всё для окна", "text": "Подборка", "products": [10, 11]}},
+]
+
+
+def test_iter_json_array_reads_in_pieces():
+    document = json.dumps(FIXTURE, ensure_ascii=False, indent=2)
+    assert list(iter_json_array(io.StringIO(document), read_size=7)) == FIXTURE
+    assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"a": 1}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"a": 1}')))
+
+
+def test_iter_json_array_stops_at_invalid_item():
+    stream = io.StringIO('[{"a": 1}, {"b": nope}, ' + ', '.join(['{"c": "' + "x" * 50 + '"}'] * 1000) + ']')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(stream, read_size=64))
+    assert stream.tell() < 200
+
+
+@pytest.mark.django_db
+def test_load_shop_fixtures(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps(FIXTURE, ensure_ascii=False), encoding="utf-8")
+    out = io.StringIO()
+    call_command("load_shop_fixtures", str(path), chunk_size=1, stdout=out)
+    assert "Загружено объектов: 10" in out.getvalue()
+
+    product = Product.objects.get(pk=10)
+    assert (product.created_at, product.updated_at) == (datetime.date(2021, 6, 8), datetime.date(2021, 6, 9))
+    assert (product.review_count, product.rating_avg) == (1, 4.0)
+    assert Product.objects.get(pk=11).modified_at is not None
+    assert Order.objects.get(pk=7).created_at == datetime.date(2021, 7, 1)
+    assert sorted(OrderedProducts.objects.values_list('product_id', 'unit_price')) == [(10, 100), (11, 300)]
+    assert sorted(Collection.objects.get(pk=2).products.values_list('pk', flat=True)) == [10, 11]
+    assert Review.objects.get(pk=3).user.username == "buyer"
+    assert sorted(DailySales.objects.values_list('product_id', 'quantity', 'revenue')) == [(10, 2, 200), (11, 1, 300)]
+
+
+@pytest.mark.django_db
+def test_load_positions_before_their_products(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps(FIXTURE[2:6] + FIXTURE[:2], ensure_ascii=False), encoding="utf-8")
+    call_command("load_shop_fixtures", str(path), chunk_size=1, stdout=io.StringIO())
+    assert sorted(OrderedProducts.objects.values_list('product_id', 'unit_price')) == [(10, 100), (11, 300)]
+
+
+@pytest.mark.django_db
+def test_load_positions_of_unknown_product(tmp_path):
+    path = tmp_path / "seed.json"
+    fixture = FIXTURE[2:4] + [{"model": "shop_api.orderedproducts", "pk": 9,
+                               "fields": {"order": 7, "product": 99, "quantity": 1}}]
+    path.write_text(json.dumps(fixture, ensure_ascii=False), encoding="utf-8")
+    with pytest.raises(ValueError, match="99"):
+        call_command("load_shop_fixtures", str(path), stdout=io.StringIO())
+
+
+@pytest.mark.django_db
+def test_load_repository_fixtures():
+    call_command("load_shop_fixtures", str(settings.BASE_DIR / "fixtures.json"), encoding="cp1251",
+                 stdout=io.StringIO())
+    assert Product.objects.count() == 3
+    assert Product.objects.create(name="Новый товар", price=1).pk == 4
+
+
+@pytest.mark.django_db
+def test_seed_benchmark_data(product_factory):
+    product_factory(name="Существующий товар")
+    out = io.StringIO()
+    call_command("seed_benchmark_data", users=20, products=50, reviews=100, orders=40, collections=3,
+                 chunk_size=7, stdout=out)
+    assert "Создано строк" in out.getvalue()
+    assert Product.objects.count() == 51
+    assert Order.objects.count() == 40
+    assert Collection.objects.count() == 3
+
+    order = Order.objects.prefetch_related('ordered_products').first()
+    assert order.total_price == sum(position.quantity * position.unit_price
+                                    for position in order.ordered_products.all())
+    product = Product.objects.filter(review_count__gt=0).first()
+    assert product.review_count == product.review_set.count()
+    assert DailySales.objects.aggregate(total=Sum('revenue'))['total'] == \
+        Order.objects.aggregate(total=Sum('total_price'))['total']
+
+    call_command("seed_benchmark_data", users=2, products=2, reviews=0, orders=0, collections=0,
+                 stdout=io.StringIO())
+    assert Product.objects.count() == 53
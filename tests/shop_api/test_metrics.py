@@ -0,0 +1,78 @@
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from shop_api.metrics import registry
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    registry.reset()
+
+
+def server_timing(response):
+    return dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])), \
+        int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+
+@pytest.mark.django_db
+def test_server_timing_header(api_client, order_factory, user_factory):
+    order_factory(_quantity=3)
+    api_client.force_authenticate(user_factory(is_staff=True))
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(reverse("orders-list"))
+    assert response.status_code == status.HTTP_200_OK
+    durations, queries = server_timing(response)
+    assert queries == len(context.captured_queries)
+    assert set(durations) == {"db", "ser", "total"}
+    assert float(durations["ser"]) > 0
+    assert float(durations["total"]) >= float(durations["db"])
+
+
+@pytest.mark.django_db
+def test_server_timing_header_asgi(product_factory):
+    product_factory(_quantity=3)
+    with CaptureQueriesContext(connection) as context:
+        response = async_to_sync(AsyncClient().get)(reverse("async-products-list"))
+    assert response.status_code == status.HTTP_200_OK
+    durations, queries = server_timing(response)
+    assert queries == len(context.captured_queries) == 1
+    assert registry.snapshot()["shop_api.async_views.product_list"]["queries"]["count"] == 1
+
+
+def test_middleware_not_adapted_under_asgi(caplog, settings):
+    settings.DEBUG = True  # Django only logs adapted middleware in debug mode
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler()
+    assert "QueryMetricsMiddleware" not in caplog.text
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(api_client, user_factory, product_factory):
+    product = product_factory()
+    api_client.get(reverse("products-list"))
+    api_client.get(reverse("products-list"))
+    api_client.get(reverse("products-detail", args=[product.id]))
+    api_client.get(reverse("async-products-list"))
+
+    url = reverse("metrics")
+    assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+    api_client.force_authenticate(user_factory(is_staff=True))
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    routes = response.json()
+    assert routes["ProductViewSet.list"]["total_ms"]["count"] == 2
+    assert routes["ProductViewSet.list"]["queries"]["buckets"]["+Inf"] == 2
+    assert routes["ProductViewSet.retrieve"]["response_bytes"]["count"] == 1
+    assert routes["shop_api.async_views.product_list"]["total_ms"]["count"] == 1
+
+    assert api_client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+    assert list(api_client.get(url).json()) == ["MetricsView.delete"]
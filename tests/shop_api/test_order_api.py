@@ -1,8 +1,20 @@
+import io
+import json
+import random
+import threading
+import time
 import pytest
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.test import APIClient
 
 from shop_api.models import Order
+from shop_api.orders import recompute_order_totals
 
 
 @pytest.mark.django_db
@@ -61,7 +73,78 @@ def test_list_positive(api_client, order_factory, user_factory, token_factory, a
     response = client.get(url)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == expected_response_length
+    assert len(response_json['results']) == expected_response_length
+
+
+@pytest.mark.django_db
+def test_list_paginated_for_owner(api_client, user_factory, token_factory, order_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    order_factory(_quantity=3, user=user)
+    order_factory(_quantity=5)
+    url = reverse("orders-list")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response_json = api_client.get(url, {"page_size": 2}).json()
+    assert len(response_json['results']) == 2
+    response_json = api_client.get(response_json['next']).json()
+    assert len(response_json['results']) == 1
+    assert response_json['next'] is None
+
+
+@pytest.mark.parametrize("orders_quantity", (1, 5, 20))
+@pytest.mark.parametrize("admin_status", (True, False))
+@pytest.mark.django_db
+def test_list_query_count(api_client, user_factory, token_factory, order_factory, product_factory,
+                          django_assert_num_queries, orders_quantity, admin_status):
+    user = user_factory(is_staff=admin_status)
+    token = token_factory(user_id=user.id)
+    product = product_factory()
+    order_factory(_quantity=orders_quantity, user=user, ordered_products__product=product)
+    url = reverse("orders-list")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    with django_assert_num_queries(5):
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_list_conditional_get(api_client, user_factory, token_factory, order_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    order_factory(user=user)
+    url = reverse("orders-list")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.get(url)
+    etag = response['ETag']
+    assert response['Last-Modified']
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    order_factory(user=user)
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()['results']) == 2
+
+
+@pytest.mark.django_db
+def test_retrieve_conditional_get(api_client, user_factory, token_factory, order_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    order = order_factory(user=user)
+    url = reverse("orders-detail", args=[order.id])
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.get(url)
+    etag = response['ETag']
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    order.status = Order.DONE
+    order.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['status'] == Order.DONE
 
 
 @pytest.mark.django_db
@@ -100,6 +183,55 @@ def test_create_validations(api_client, user_factory, token_factory, product_fac
     assert response.status_code == http_response
 
 
+@pytest.mark.django_db
+def test_create_multiple_positions(api_client, user_factory, token_factory, product_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    products = [product_factory(price=price) for price in (10, 20, 30)]
+    url = reverse("orders-list")
+    payload = {
+        "ordered_products": [
+            {"product": product.id, "quantity": quantity}
+            for product, quantity in zip(products, (1, 2, 3))
+        ]
+    }
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.post(url, payload, format='json')
+    response_json = response.json()
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response_json['total_price'] == 140
+    order = Order.objects.get(user=user)
+    assert order.ordered_products.count() == 3
+
+
+@pytest.mark.django_db
+def test_create_loads_products_once(api_client, user_factory, product_factory, query_inspector):
+    products = product_factory(_quantity=8)
+    api_client.force_authenticate(user_factory())
+    payload = {
+        "ordered_products": [{"product": product.id, "quantity": 1} for product in products]
+        + [{"product": 0, "quantity": 1}]
+    }
+    response = api_client.post(reverse("orders-list"), payload, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'product' in response.json()['ordered_products']['8']
+    payload["ordered_products"].pop()
+    assert api_client.post(reverse("orders-list"), payload, format='json').status_code == status.HTTP_201_CREATED
+    assert query_inspector.reports == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("product_input", [True, [1]])
+def test_create_rejects_non_key_product(api_client, user_factory, product_factory, product_input):
+    product_factory(id=1)
+    api_client.force_authenticate(user_factory())
+    payload = {"ordered_products": [{"product": product_input, "quantity": 1}]}
+    response = api_client.post(reverse("orders-list"), payload, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'product' in response.json()['ordered_products']['0']
+    assert not Order.objects.exists()
+
+
 @pytest.mark.django_db
 def test_create_auth_permission(api_client, order_factory, product_factory):
     product = product_factory()
@@ -183,7 +315,7 @@ def test_status_filter(api_client, user_factory, token_factory, order_factory, s
     response = client.get(url, payload)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == expected_quantity
+    assert len(response_json['results']) == expected_quantity
 
 
 @pytest.mark.parametrize(
@@ -211,7 +343,7 @@ def test_price_filter(api_client, user_factory, token_factory, order_factory, te
     response = api_client.get(url, test_payload)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == expected_quantity
+    assert len(response_json['results']) == expected_quantity
 
 
 @pytest.mark.parametrize(
@@ -257,7 +389,7 @@ def test_dates_filter(api_client, user_factory, token_factory, order_factory, te
     response = client.get(url, test_payload)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == expected_quantity
+    assert len(response_json['results']) == expected_quantity
 
 
 @pytest.mark.django_db
@@ -276,5 +408,196 @@ def test_positions_filter(api_client, user_factory, token_factory, order_factory
     response = api_client.get(url, payload)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == 1
-    assert response_json[0]['ordered_products'][0]['product'] == product.id
+    assert len(response_json['results']) == 1
+    assert response_json['results'][0]['ordered_products'][0]['product'] == product.id
+
+
+@pytest.mark.parametrize(
+    ["admin_status", "http_response"],
+    (
+        (True, status.HTTP_200_OK),
+        (False, status.HTTP_403_FORBIDDEN)
+    )
+)
+@pytest.mark.django_db
+def test_export_permissions(api_client, user_factory, token_factory, admin_status, http_response):
+    user = user_factory(is_staff=admin_status)
+    token = token_factory(user_id=user.id)
+    url = reverse("orders-export")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.get(url)
+    assert response.status_code == http_response
+
+
+@pytest.mark.django_db
+def test_export_ndjson(api_client, user_factory, token_factory, order_factory, product_factory):
+    user = user_factory(is_staff=True)
+    token = token_factory(user_id=user.id)
+    product = product_factory()
+    order_factory(_quantity=3, status="DONE", ordered_products__product=product)
+    order_factory(_quantity=2)
+    url = reverse("orders-export")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.get(url, {"status": "DONE"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+    assert len(rows) == 3
+    assert all(row['status'] == "DONE" for row in rows)
+    assert rows[0]['ordered_products'][0]['product'] == product.id
+
+
+@pytest.mark.django_db
+def test_retrieve_and_export_skip_products(api_client, user_factory, order_factory, product_factory):
+    user = user_factory(is_staff=True)
+    products = product_factory(_quantity=3)
+    order = order_factory(user=user)
+    for product in reversed(products):
+        order.ordered_products.create(product=product, quantity=1)
+    api_client.force_authenticate(user)
+    with CaptureQueriesContext(connection) as queries:
+        retrieved = api_client.get(reverse("orders-detail", args=[order.id])).json()
+        exported = b''.join(api_client.get(reverse("orders-export")).streaming_content)
+    assert retrieved['positions'] == [product.id for product in reversed(products)]
+    assert json.loads(exported)['positions'] == retrieved['positions']
+    assert not any('"shop_api_product"' in query['sql'] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(["unit_price", "expected"], ((10, 30), (15, 15)))
+def test_admin_product_change_refills_unit_price(client, user_factory, order_factory, product_factory,
+                                                 unit_price, expected):
+    admin_user = user_factory(is_staff=True, is_superuser=True)
+    old_product, new_product = product_factory(price=10), product_factory(price=30)
+    order = order_factory(user=admin_user)
+    position = order.ordered_products.create(product=old_product, quantity=1)
+    client.force_login(admin_user)
+    response = client.post(reverse("admin:shop_api_order_change", args=[order.id]), {
+        "user": admin_user.id,
+        "status": order.status,
+        "ordered_products-TOTAL_FORMS": 1,
+        "ordered_products-INITIAL_FORMS": 1,
+        "ordered_products-0-id": position.id,
+        "ordered_products-0-order": order.id,
+        "ordered_products-0-product": new_product.id,
+        "ordered_products-0-quantity": 1,
+        "ordered_products-0-unit_price": unit_price,
+    })
+    assert response.status_code == status.HTTP_302_FOUND
+    position.refresh_from_db()
+    assert position.product_id == new_product.id
+    assert position.unit_price == expected
+    order.refresh_from_db()
+    assert order.total_price == expected
+
+
+@pytest.mark.django_db
+def test_update_positions_recomputes_total(api_client, user_factory, token_factory, order_factory,
+                                           product_factory):
+    user = user_factory(is_staff=True)
+    token = token_factory(user_id=user.id)
+    first_product = product_factory(price=10)
+    second_product = product_factory(price=25)
+    order = order_factory(total_price=10, ordered_products__product=first_product, ordered_products__quantity=1)
+    url = reverse("orders-detail", args=[order.id])
+    payload = {
+        "ordered_products": [
+            {"product": first_product.id, "quantity": 3},
+            {"product": second_product.id, "quantity": 2}
+        ]
+    }
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.patch(url, payload, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['total_price'] == 80
+    assert order.ordered_products.count() == 2
+
+
+@pytest.mark.django_db
+def test_recompute_order_totals_command(order_factory, product_factory):
+    product = product_factory(price=40)
+    orders = order_factory(_quantity=3, total_price=1, ordered_products__product=product,
+                           ordered_products__quantity=2)
+    empty_order = order_factory(total_price=1)
+    call_command("recompute_order_totals", batch_size=2, stdout=io.StringIO())
+    assert list(Order.objects.filter(id__in=[order.id for order in orders]).values_list('total_price', flat=True)) \
+        == [80, 80, 80]
+    empty_order.refresh_from_db()
+    assert empty_order.total_price == 0
+
+
+@pytest.mark.django_db
+def test_positions_keep_price_snapshot(api_client, user_factory, token_factory, product_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    product = product_factory(price=30)
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.post(reverse("orders-list"), {"ordered_products": [{"product": product.id, "quantity": 2}]},
+                               format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()['ordered_products'][0]['unit_price'] == 30
+
+    product.price = 50
+    product.save()
+    order = Order.objects.get()
+    recompute_order_totals(Order.objects.all())
+    order.refresh_from_db()
+    assert order.total_price == 60
+    assert order.ordered_products.get().unit_price == 30
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_orders_and_price_changes(user_factory, product_factory):
+    if connection.vendor == 'sqlite':
+        pytest.skip("SQLite test databases reject concurrent writers with table locks")
+    products = product_factory(_quantity=4, price=100)
+    customer, admin = user_factory(), user_factory(is_staff=True)
+    buyers, repricers, rounds = 8, 2, 10
+    barrier = threading.Barrier(buyers + repricers)
+
+    def place_orders(seed):
+        rng = random.Random(seed)
+        client = APIClient()
+        client.force_authenticate(customer)
+        results = []
+        barrier.wait()
+        try:
+            for _ in range(rounds):
+                # Positions in random order: the locks are still taken by product id.
+                chosen = rng.sample(products, 3)
+                payload = {"ordered_products": [{"product": product.id, "quantity": 2} for product in chosen]}
+                started = time.perf_counter()
+                response = client.post(reverse("orders-list"), payload, format='json')
+                results.append((response.status_code, time.perf_counter() - started))
+            return results
+        finally:
+            connection.close()
+
+    def change_prices(seed):
+        rng = random.Random(seed)
+        client = APIClient()
+        client.force_authenticate(admin)
+        results = []
+        barrier.wait()
+        try:
+            for _ in range(rounds):
+                product = rng.choice(products)
+                started = time.perf_counter()
+                response = client.patch(reverse("products-detail", args=[product.id]), {"price": rng.randint(1, 500)})
+                results.append((response.status_code, time.perf_counter() - started))
+            return results
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=buyers + repricers) as executor:
+        futures = [executor.submit(place_orders, seed) for seed in range(buyers)]
+        futures += [executor.submit(change_prices, seed) for seed in range(repricers)]
+        results = [result for future in futures for result in future.result()]
+
+    assert {code for code, _ in results} <= {status.HTTP_201_CREATED, status.HTTP_200_OK, status.HTTP_409_CONFLICT}
+    assert max(duration for _, duration in results) < settings.ORDER_LOCK_TIMEOUT_MS / 1000 + 5
+    orders = Order.objects.prefetch_related('ordered_products')
+    assert orders.count() == buyers * rounds
+    for order in orders:
+        assert order.total_price == sum(position.quantity * position.unit_price
+                                        for position in order.ordered_products.all())
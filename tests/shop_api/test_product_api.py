@@ -1,6 +1,22 @@
+import io
+import threading
 import pytest
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
 from django.urls import reverse
-from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_403_FORBIDDEN, HTTP_204_NO_CONTENT
+from rest_framework.test import APIClient
+from shop_api import search
+from shop_api.cache import bump_version, get_versions
+from shop_api.checks import shared_cache_check
+from shop_api.exceptions import Conflict
+from shop_api.models import Product
+from shop_api.pagination import KeysetPagination
+from shop_api.search import build_index, search_products
+from shop_api.serializers import ProductSerializer
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_403_FORBIDDEN, HTTP_204_NO_CONTENT, \
+    HTTP_304_NOT_MODIFIED, HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT, HTTP_412_PRECONDITION_FAILED
 
 
 @pytest.mark.django_db
@@ -20,7 +36,7 @@ def test_list(api_client, product_factory):
     response = api_client.get(url)
     response_json = response.json()
     assert response.status_code == HTTP_200_OK
-    assert len(products) == len(response_json)
+    assert len(products) == len(response_json['results'])
 
 
 @pytest.mark.parametrize(
@@ -45,7 +61,7 @@ def test_price_filter(api_client, product_factory, min_value, max_value, expecte
     response = api_client.get(url, payload)
     response_json = response.json()
     assert response.status_code == HTTP_200_OK
-    assert len(response_json) == expected_quantity
+    assert len(response_json['results']) == expected_quantity
 
 
 @pytest.mark.parametrize(
@@ -71,7 +87,7 @@ def test_text_filter(api_client, product_factory, search_example, expected_quant
     response = api_client.get(url, payload)
     response_json = response.json()
     assert response.status_code == HTTP_200_OK
-    assert len(response_json) == expected_quantity
+    assert len(response_json['results']) == expected_quantity
 
 
 @pytest.mark.parametrize(
@@ -118,6 +134,93 @@ def test_update(api_client, product_factory, user_factory, token_factory, is_adm
     assert response.status_code == http_response
 
 
+@pytest.mark.django_db
+def test_update_version_conflict(api_client, product_factory, user_factory):
+    product = product_factory(price=10)
+    url = reverse("products-detail", args=[product.id])
+    api_client.force_authenticate(user_factory(is_staff=True))
+    assert api_client.get(url).json()['version'] == 1
+
+    response = api_client.patch(url, {"price": 20, "version": 1})
+    assert response.status_code == HTTP_200_OK
+    assert response.json()['version'] == 2
+    response = api_client.patch(url, {"price": 30, "version": 1})
+    assert response.status_code == HTTP_409_CONFLICT
+    product.refresh_from_db()
+    assert (product.price, product.version) == (20, 2)
+
+    response = api_client.patch(url, {"price": 40})
+    assert (response.status_code, response.json()['version']) == (HTTP_200_OK, 3)
+    response = api_client.post(reverse("products-list"), {"name": "Новый", "price": 1, "version": 7})
+    assert response.json()['version'] == 1
+
+
+@pytest.mark.django_db
+def test_update_keeps_concurrent_rating(product_factory):
+    product = product_factory(price=10)
+    instance = Product.objects.get(pk=product.pk)
+    Product.objects.filter(pk=product.pk).update(rating_avg=4.5, review_count=2)
+    serializer = ProductSerializer(instance, data={"price": 15}, partial=True)
+    assert serializer.is_valid()
+    serializer.save()
+    product.refresh_from_db()
+    assert (product.price, product.rating_avg, product.review_count, product.version) == (15, 4.5, 2, 2)
+
+
+@pytest.mark.django_db
+def test_update_without_version_is_unconditional(product_factory):
+    product = product_factory(price=10)
+    instance = Product.objects.get(pk=product.pk)
+    Product.objects.filter(pk=product.pk).update(version=F('version') + 1)
+    serializer = ProductSerializer(instance, data={"price": 15}, partial=True)
+    assert serializer.is_valid()
+    assert serializer.save().version == 3
+    product.refresh_from_db()
+    assert (product.price, product.version) == (15, 3)
+
+    serializer = ProductSerializer(instance, data={"price": 20, "version": 2}, partial=True)
+    assert serializer.is_valid()
+    with pytest.raises(Conflict):
+        serializer.save()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_updates_lose_nothing(product_factory, user_factory):
+    if connection.vendor == 'sqlite':
+        pytest.skip("SQLite test databases reject concurrent writers with table locks")
+    product = product_factory(price=100)
+    admin = user_factory(is_staff=True)
+    url = reverse("products-detail", args=[product.id])
+    workers, increments = 5, 10
+    barrier = threading.Barrier(workers)
+
+    def increment_prices():
+        client = APIClient()
+        client.force_authenticate(admin)
+        conflicts = 0
+        barrier.wait()
+        try:
+            for _ in range(increments):
+                while True:
+                    current = client.get(url).json()
+                    response = client.patch(url, {"price": current['price'] + 1, "version": current['version']})
+                    if response.status_code == HTTP_200_OK:
+                        break
+                    assert response.status_code == HTTP_409_CONFLICT
+                    conflicts += 1
+            return conflicts
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        conflicts = sum(executor.map(lambda _: increment_prices(), range(workers)))
+
+    product.refresh_from_db()
+    assert product.price == 100 + workers * increments
+    assert product.version == 1 + workers * increments
+    assert conflicts > 0
+
+
 @pytest.mark.parametrize(
     ["is_admin", "http_response"],
     (
@@ -137,3 +240,206 @@ def test_destroy(api_client, product_factory, user_factory, token_factory, is_ad
     assert response.status_code == http_response
 
 
+@pytest.mark.django_db
+def test_list_cursor_pagination(api_client, product_factory):
+    products = product_factory(_quantity=25)
+    url = reverse("products-list")
+    seen = []
+    response_json = api_client.get(url, {"page_size": 10}).json()
+    seen.extend(item['name'] for item in response_json['results'])
+    while response_json['next']:
+        response_json = api_client.get(response_json['next']).json()
+        seen.extend(item['name'] for item in response_json['results'])
+    assert len(response_json['results']) == 5
+    assert sorted(seen) == sorted(product.name for product in products)
+
+    previous_json = api_client.get(response_json['previous']).json()
+    assert [item['name'] for item in previous_json['results']] == seen[10:20]
+
+
+@pytest.mark.django_db
+def test_list_page_size_cap(api_client, product_factory, monkeypatch):
+    monkeypatch.setattr(KeysetPagination, "max_page_size", 3)
+    product_factory(_quantity=5)
+    url = reverse("products-list")
+    response = api_client.get(url, {"page_size": 1000})
+    assert response.status_code == HTTP_200_OK
+    assert len(response.json()['results']) == 3
+
+
+@pytest.mark.parametrize(
+    ["search_example", "expected_names"],
+    (
+        ("карниз", ["Карниз потолочный", "Штанга"]),
+        ("штанга", ["Штанга"]),
+        ("карниз потолочный", ["Карниз потолочный"]),
+        ("кронштейн", []),
+        ("КАРН", ["Карниз потолочный", "Штанга"]),
+        ("низ", []),
+    )
+)
+@pytest.mark.django_db
+def test_search(api_client, product_factory, search_example, expected_names):
+    product_factory(name="Карниз потолочный", description="Белый профиль")
+    product_factory(name="Штанга", description="Штанга для карниз")
+    product_factory(name="Наконечник", description="Латунь")
+    url = reverse("products-list")
+    response = api_client.get(url, {"search": search_example})
+    response_json = response.json()
+    assert response.status_code == HTTP_200_OK
+    assert [item['name'] for item in response_json['results']] == expected_names
+
+
+@pytest.mark.django_db
+def test_search_indexes_candidates_only(product_factory, monkeypatch):
+    product_factory(name="Карниз", description="")
+    product_factory(_quantity=5, description="Латунь")
+    indexed = []
+    monkeypatch.setattr(search, "build_index", lambda queryset: indexed.extend(queryset) or build_index(queryset))
+    assert [product.name for product in search_products(Product.objects.all(), "карниз")] == ["Карниз"]
+    assert [product.name for product in indexed] == ["Карниз"]
+
+
+@pytest.mark.django_db
+def test_rating_filter_and_ordering(api_client, product_factory):
+    for rating in (1.5, 4.5, 3.0, 5.0):
+        product_factory(name=f"Товар {rating}", rating_avg=rating, review_count=2)
+    url = reverse("products-list")
+    response = api_client.get(url, {"rating_min": 3, "ordering": "-rating", "page_size": 2})
+    response_json = response.json()
+    assert response.status_code == HTTP_200_OK
+    assert [item['rating_avg'] for item in response_json['results']] == [5.0, 4.5]
+    response_json = api_client.get(response_json['next']).json()
+    assert [item['rating_avg'] for item in response_json['results']] == [3.0]
+
+
+@pytest.mark.django_db
+def test_rebuild_product_ratings(product_factory, review_factory):
+    product = product_factory()
+    review_factory(product=product, rating=5)
+    review_factory(product=product, rating=4)
+    call_command("rebuild_product_ratings", stdout=io.StringIO())
+    product.refresh_from_db()
+    assert (product.review_count, product.rating_total, product.rating_avg) == (2, 9, 4.5)
+
+
+@pytest.mark.django_db
+def test_list_cache(api_client, product_factory, django_assert_num_queries):
+    product = product_factory(price=100)
+    url = reverse("products-list")
+    response = api_client.get(url)
+    etag = response['ETag']
+    with django_assert_num_queries(0):
+        cached_response = api_client.get(url)
+    assert cached_response.json() == response.json()
+    assert cached_response['ETag'] == etag
+
+    not_modified = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == HTTP_304_NOT_MODIFIED
+
+    product.price = 200
+    product.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTP_200_OK
+    assert response.json()['results'][0]['price'] == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_retrieve_conditional_get(api_client, product_factory):
+    product = product_factory(price=100)
+    url = reverse("products-detail", args=[product.id])
+    response = api_client.get(url)
+    etag = response['ETag']
+    assert response['Last-Modified']
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTP_304_NOT_MODIFIED
+    response = api_client.get(url, HTTP_IF_MATCH='"stale"')
+    assert response.status_code == HTTP_412_PRECONDITION_FAILED
+
+    product.price = 200
+    product.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTP_200_OK
+    assert response.json()['price'] == 200
+
+
+def test_bump_version_never_repeats():
+    versions = get_versions([Product])
+    for _ in range(3):
+        bump_version(Product)
+        versions += get_versions([Product])
+    assert len(set(versions)) == 4
+
+
+def test_shared_cache_check(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert [warning.id for warning in shared_cache_check(None)] == ['shop_api.W001']
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                   'LOCATION': 'shop_api_cache'}}
+    assert shared_cache_check(None) == []
+
+
+@pytest.mark.django_db
+def test_bulk_upsert(api_client, user_factory, product_factory):
+    product_factory(name="Карниз", description="Двухрядный", price=100)
+    url = reverse("products-bulk")
+    payload = [
+        {"name": "Карниз", "price": 150},
+        {"name": "Штора", "description": "Блэкаут", "price": 900},
+        {"name": "Тюль", "price": -5},
+        {"price": 10},
+    ]
+    api_client.force_authenticate(user_factory())
+    assert api_client.post(url, payload, format='json').status_code == HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user_factory(is_staff=True))
+    response = api_client.post(url, payload, format='json')
+    assert response.status_code == HTTP_200_OK
+    response_json = response.json()
+    assert (response_json['created'], response_json['updated']) == (1, 1)
+    assert [error['index'] for error in response_json['errors']] == [2, 3]
+    assert 'price' in response_json['errors'][0]['errors']
+    assert sorted(Product.objects.values_list('name', 'description', 'price')) == [
+        ("Карниз", "Двухрядный", 150),
+        ("Штора", "Блэкаут", 900),
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_bumps_version(api_client, user_factory, product_factory):
+    product = product_factory(name="Карниз", price=100)
+    api_client.force_authenticate(user_factory(is_staff=True))
+    detail_url = reverse("products-detail", args=[product.id])
+    version = api_client.get(detail_url).json()["version"]
+
+    payload = [{"name": "Карниз", "price": 150}, {"name": "Штора", "price": 900}]
+    assert api_client.post(reverse("products-bulk"), payload, format='json').status_code == HTTP_200_OK
+    assert dict(Product.objects.values_list('name', 'version')) == {"Карниз": version + 1, "Штора": 1}
+
+    # A client still holding the version read before the import must not overwrite it.
+    response = api_client.patch(detail_url, {"price": 120, "version": version}, format='json')
+    assert response.status_code == HTTP_409_CONFLICT
+    product.refresh_from_db()
+    assert product.price == 150
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_ndjson(api_client, user_factory, product_factory, monkeypatch):
+    from shop_api.views import ProductViewSet
+    monkeypatch.setattr(ProductViewSet, "bulk_chunk_size", 2)
+    product_factory(name="Карниз", price=100)
+    lines = ['{"name": "Карниз", "price": 120}', '', '{"name": "Штора", "price": 900}', '{"name": ',
+             '{"name": "Тюль", "price": 300}']
+    api_client.force_authenticate(user_factory(is_staff=True))
+    response = api_client.generic("POST", reverse("products-bulk"), "\n".join(lines).encode(),
+                                  content_type="application/x-ndjson")
+    assert response.status_code == HTTP_200_OK
+    response_json = response.json()
+    assert (response_json['created'], response_json['updated']) == (2, 1)
+    assert [error['index'] for error in response_json['errors']] == [2]
+    assert sorted(Product.objects.values_list('name', 'price')) == [("Карниз", 120), ("Тюль", 300), ("Штора", 900)]
+
+    response = api_client.post(reverse("products-bulk"), {"name": "Карниз", "price": 1}, format='json')
+    assert response.status_code == HTTP_400_BAD_REQUEST
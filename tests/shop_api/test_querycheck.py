@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from shop_api.models import Review
+from shop_api.querycheck import QueryInspectionMiddleware, QueryInspector, fingerprint
+from shop_api.serializers import ReviewSerializer
+
+
+def test_fingerprint_ignores_parameters():
+    assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a''b'") == \
+        fingerprint("SELECT *\n FROM t WHERE id = 25 AND name = 'c'")
+    assert fingerprint('SELECT * FROM t WHERE id IN (%s, %s)') == \
+        fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)')
+    assert fingerprint('SELECT * FROM t WHERE id = %s') != fingerprint('SELECT * FROM u WHERE id = %s')
+
+
+@pytest.mark.django_db
+def test_repeated_query_attributed_to_field(review_factory):
+    review_factory(_quantity=3)
+    inspector = QueryInspector(threshold=3)
+    with inspector.installed():
+        ReviewSerializer(Review.objects.all(), many=True).data
+    offenders = inspector.offenders()
+    assert len(offenders) == 1
+    assert offenders[0].count == 3
+    assert '"auth_user"' in offenders[0].fingerprint
+    (field, location), = offenders[0].origins
+    assert field == "ReviewSerializer.user"
+    assert location.startswith("tests/shop_api/test_querycheck.py:")
+
+
+@pytest.mark.django_db
+def test_request_inspector(api_client, query_inspector, review_factory, product_factory):
+    review_factory(_quantity=10)
+    product = product_factory()
+    response = api_client.post(reverse("orders-list"), {})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert api_client.get(reverse("reviews-list")).status_code == status.HTTP_200_OK
+    assert api_client.get(reverse("reviews-list"), {"product": product.id}).status_code == status.HTTP_200_OK
+    assert query_inspector.reports == []
+
+
+@pytest.mark.django_db
+def test_middleware_logs_offenders(rf, caplog, review_factory):
+    review_factory(_quantity=5)
+
+    def view(request):
+        ReviewSerializer(Review.objects.all(), many=True).data
+        return None
+
+    with caplog.at_level(logging.WARNING, logger="shop_api.querycheck"):
+        QueryInspectionMiddleware(view)(rf.get("/api/v1/product-reviews/"))
+    message, = caplog.messages
+    assert message.startswith("GET /api/v1/product-reviews/: repeated query: 5×")
+    assert "ReviewSerializer.user at tests/shop_api/test_querycheck.py:" in message
@@ -1,7 +1,17 @@
+import csv
+import io
+import json
+import threading
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from django.db import IntegrityError, connection
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIClient
+
+from shop_api.models import Review
 
 
 @pytest.mark.django_db
@@ -17,6 +27,26 @@ def test_retrieve(api_client, user_factory, product_factory, review_factory):
     assert review.product.id == response_json['product']
 
 
+@pytest.mark.django_db
+def test_retrieve_conditional_get(api_client, review_factory):
+    review = review_factory(rating=3)
+    url = reverse("reviews-detail", args=[review.id])
+    response = api_client.get(url)
+    etag = response['ETag']
+    assert response['Last-Modified']
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = api_client.get(url, HTTP_IF_MATCH='"stale"')
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    review.rating = 4
+    review.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['rating'] == 4
+
+
 @pytest.mark.django_db
 def test_list(api_client, review_factory):
     review = review_factory(_quantity=10)
@@ -24,7 +54,7 @@ def test_list(api_client, review_factory):
     response = api_client.get(url)
     response_json = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert len(response_json) == 10
+    assert len(response_json['results']) == 10
 
 
 @pytest.mark.django_db
@@ -126,8 +156,8 @@ def test_filter_user_id(api_client, review_factory):
     }
     response = api_client.get(url, payload)
     response_json = response.json()
-    assert len(response_json) == 1
-    assert response.data[0]['user']['id'] == test_id
+    assert len(response_json['results']) == 1
+    assert response.data['results'][0]['user']['id'] == test_id
 
 
 @pytest.mark.django_db
@@ -140,8 +170,8 @@ def test_filter_product_id(api_client, review_factory):
     }
     response = api_client.get(url, payload)
     response_json = response.json()
-    assert len(response_json) == 1
-    assert response.data[0]['product'] == test_id
+    assert len(response_json['results']) == 1
+    assert response.data['results'][0]['product'] == test_id
 
 
 @pytest.mark.django_db
@@ -154,5 +184,149 @@ def test_filter_date(api_client, review_factory):
     }
     response = api_client.get(url, payload)
     response_json = response.json()
-    assert len(response_json) == 1
-    assert date.fromisoformat(response.data[0]['created_at']) == test_date
+    assert len(response_json['results']) == 1
+    assert date.fromisoformat(response.data['results'][0]['created_at']) == test_date
+
+
+@pytest.mark.django_db
+def test_export_csv(api_client, user_factory, token_factory, review_factory):
+    user = user_factory(is_staff=True)
+    token = token_factory(user_id=user.id)
+    reviews = review_factory(_quantity=4)
+    url = reverse("reviews-export")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.get(url, {"export_format": "csv", "product": reviews[0].product.id})
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+    assert len(rows) == 1
+    assert int(rows[0]['product']) == reviews[0].product.id
+    assert json.loads(rows[0]['user'])['id'] == reviews[0].user.id
+
+
+@pytest.mark.django_db
+def test_export_unknown_format(api_client, user_factory, token_factory):
+    user = user_factory(is_staff=True)
+    token = token_factory(user_id=user.id)
+    url = reverse("reviews-export")
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.get(url, {"export_format": "xml"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_product_rating_aggregates(api_client, user_factory, token_factory, product_factory):
+    product = product_factory()
+    other_product = product_factory()
+    users = user_factory(_quantity=2)
+    tokens = [token_factory(user_id=user.id) for user in users]
+    url = reverse("reviews-list")
+    for token, rating in zip(tokens, (5, 2)):
+        api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        response = api_client.post(url, {"product": product.id, "text": "Test review", "rating": rating})
+        assert response.status_code == status.HTTP_201_CREATED
+    product.refresh_from_db()
+    assert (product.review_count, product.rating_avg) == (2, 3.5)
+
+    review_id = product.review_set.get(user=users[1]).id
+    response = api_client.patch(reverse("reviews-detail", args=[review_id]), {"rating": 4})
+    assert response.status_code == status.HTTP_200_OK
+    product.refresh_from_db()
+    assert (product.review_count, product.rating_avg) == (2, 4.5)
+
+    response = api_client.patch(reverse("reviews-detail", args=[review_id]), {"product": other_product.id})
+    assert response.status_code == status.HTTP_200_OK
+    product.refresh_from_db()
+    other_product.refresh_from_db()
+    assert (product.review_count, product.rating_avg) == (1, 5.0)
+    assert (other_product.review_count, other_product.rating_avg) == (1, 4.0)
+
+    response = api_client.delete(reverse("reviews-detail", args=[review_id]))
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    other_product.refresh_from_db()
+    assert (other_product.review_count, other_product.rating_avg) == (0, 0.0)
+
+
+@pytest.mark.django_db
+def test_duplicate_create(api_client, user_factory, token_factory, review_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    review = review_factory(user=user)
+    url = reverse("reviews-list")
+    payload = {
+        "product": review.product.id,
+        "text": "Test review",
+        "rating": 5
+    }
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.post(url, payload)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()['non_field_errors'] == ['Нельзя оставлять более одного отзыва.']
+
+
+@pytest.mark.django_db
+def test_update_to_reviewed_product(api_client, user_factory, review_factory):
+    user = user_factory()
+    review, other_review = review_factory(user=user), review_factory(user=user)
+    api_client.force_authenticate(user)
+    response = api_client.patch(reverse("reviews-detail", args=[review.id]), {"product": other_review.product_id})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()['non_field_errors'] == ['Нельзя оставлять более одного отзыва.']
+
+
+@pytest.mark.django_db
+def test_other_integrity_errors_not_reported_as_duplicates(api_client, user_factory, product_factory, monkeypatch):
+    def fail(*args, **kwargs):
+        raise IntegrityError('NOT NULL constraint failed: shop_api_review.text')
+    monkeypatch.setattr(ModelSerializer, "create", fail)
+    api_client.force_authenticate(user_factory())
+    with pytest.raises(IntegrityError):
+        api_client.post(reverse("reviews-list"), {"product": product_factory().id, "text": "Test", "rating": 5})
+
+
+@pytest.mark.django_db
+def test_update_own_with_same_product(api_client, user_factory, token_factory, review_factory):
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    own_review = review_factory(user=user)
+    url = reverse("reviews-detail", args=[own_review.id])
+    payload = {
+        "product": own_review.product.id,
+        "text": "changed text",
+        "rating": 2
+    }
+    api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    response = api_client.put(url, payload)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_create(user_factory, token_factory, product_factory):
+    if connection.vendor == 'sqlite':
+        pytest.skip("SQLite test databases reject concurrent writers with table locks")
+    user = user_factory()
+    token = token_factory(user_id=user.id)
+    product = product_factory()
+    url = reverse("reviews-list")
+    payload = {
+        "product": product.id,
+        "text": "Test review",
+        "rating": 5
+    }
+    barrier = threading.Barrier(5)
+
+    def create_review():
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        barrier.wait()
+        try:
+            return client.post(url, payload).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        statuses = list(executor.map(lambda _: create_review(), range(5)))
+
+    assert statuses.count(status.HTTP_201_CREATED) == 1
+    assert statuses.count(status.HTTP_400_BAD_REQUEST) == 4
+    assert Review.objects.filter(user=user, product=product).count() == 1
@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from shop_api.models import OrderedProducts
+
+
+def get(client, url, params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response, " ".join(query["sql"] for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_products(api_client, product_factory):
+    product = product_factory(description="Длинное описание")
+    product_factory(_quantity=2)
+
+    response, sql = get(api_client, reverse("products-list"), {"fields": "name,price"})
+    assert all(list(item) == ["name", "price"] for item in response.json()["results"])
+    assert '"description"' not in sql and '"rating_avg"' not in sql
+
+    response, sql = get(api_client, reverse("products-list"), {"fields": "price", "ordering": "-rating"})
+    assert list(response.json()["results"][0]) == ["price"]
+
+    response, sql = get(api_client, reverse("products-detail", args=[product.id]), {"omit": "description,rating_avg"})
+    assert list(response.json()) == ["name", "price", "review_count", "created_at", "updated_at", "version"]
+    assert '"description"' not in sql
+
+
+@pytest.mark.django_db
+def test_orders(api_client, user_factory, order_factory, product_factory):
+    for order in order_factory(_quantity=3):
+        OrderedProducts.objects.create(order=order, product=product_factory(), quantity=1)
+    api_client.force_authenticate(user_factory(is_staff=True))
+
+    response, sql = get(api_client, reverse("orders-list"), {"fields": "status,total_price"})
+    assert all(list(item) == ["status", "total_price"] for item in response.json()["results"])
+    assert "auth_user" not in sql and "shop_api_orderedproducts" not in sql
+
+    order = response.json()["results"][0]
+    response, sql = get(api_client, reverse("orders-detail", args=[order_factory().id]),
+                        {"omit": "ordered_products,positions,user"})
+    assert list(response.json()) == ["status", "total_price", "created_at", "updated_at"]
+    assert '"auth_user"."username"' not in sql and "shop_api_orderedproducts" not in sql
+
+
+@pytest.mark.django_db
+def test_reviews_and_collections(api_client, review_factory, collection_factory, product_factory):
+    review_factory(_quantity=3, text="Длинный текст отзыва")
+    collection_factory().products.set(product_factory(_quantity=2))
+
+    response, sql = get(api_client, reverse("reviews-list"), {"omit": "user,text"})
+    assert list(response.json()["results"][0]) == ["product", "rating", "created_at", "updated_at"]
+    assert "auth_user" not in sql and '"text"' not in sql
+
+    response, sql = get(api_client, reverse("collections-list"), {"fields": "title"})
+    assert list(response.json()["results"][0]) == ["title"]
+    assert "shop_api_product" not in sql
+
+
+@pytest.mark.django_db
+def test_export_and_errors(api_client, user_factory, review_factory, product_factory):
+    review_factory(_quantity=2)
+    api_client.force_authenticate(user_factory(is_staff=True))
+    response = api_client.get(reverse("reviews-export"), {"export_format": "csv", "fields": "rating,product"})
+    assert b"".join(response.streaming_content).decode().splitlines()[0] == "product,rating"
+
+    response = api_client.get(reverse("products-list"), {"fields": "name,secret"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "secret" in response.json()["fields"]
+
+    product = product_factory()
+    response = api_client.patch(reverse("products-detail", args=[product.id]) + "?fields=name", {"price": 5})
+    assert response.status_code == status.HTTP_200_OK
+    assert "price" in response.json()